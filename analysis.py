@@ -1,13 +1,16 @@
-import glob
 import os
 import pandas as pd
 import numpy as np
+import pyarrow.csv as pacsv
 
 if __name__ == "__main__":
-    list_of_files = glob.glob(os.getcwd() + '/data/*') # * means all if need specific format then *.csv
-    latest_file = max(list_of_files, key=os.path.getctime)
+    # One directory pass; DirEntry caches its stat result
+    with os.scandir(os.getcwd() + '/data') as entries:
+        latest_file = max(entries, key=lambda e: e.stat().st_ctime).path
 
-    df = pd.read_csv(latest_file)
+    # Only the description and item name are used below
+    convert_options = pacsv.ConvertOptions(include_columns=['Description', 'Name'])
+    df = pacsv.read_csv(latest_file, convert_options=convert_options).to_pandas(types_mapper=pd.ArrowDtype)
     orders = df[df['Description'] == 'Order']
     print(orders)
     cabi_orders = orders[orders['Name'].str.contains('CAbi')]
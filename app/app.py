@@ -1,50 +1,50 @@
 from dash import Dash, Input, Output, State, callback, html, dcc, dash_table
 import plotly.express as px 
 import pandas as pd
-import numpy as np
 import dash_bootstrap_components as dbc
+import math
 
 
 def transform(df):
-    df.replace('--', np.nan, inplace=True)
     report = df[df['Type'] == 'Order']
-    report = report[['Transaction creation date', 'Type', 'Order number', 'Net amount', 'Item title', 'Buyer username']]
+    report = report[['Transaction creation date', 'Type', 'Order number', 'Net amount', 'Item title', 'Buyer username']].copy()
     report.rename(columns={'Transaction creation date': 'date'}, inplace=True)
     report.rename(columns={'Type': 'type'}, inplace=True)
     report.rename(columns={'Order number': 'order'}, inplace=True)
     report.rename(columns={'Net amount': 'net'}, inplace=True)
     report.rename(columns={'Item title': 'title'}, inplace=True)
     report.rename(columns={'Buyer username': 'buyer'}, inplace=True)
+    report['date'] = pd.to_datetime(report['date'], format='%b %d, %Y', cache=True, errors='coerce')
 
     # print(report[report['Date'].str.contains('apr', case=False)])
     # report = report[~report['Date'].str.contains('apr', case=False)]
 
-    orders = report[report['type'] == 'order']
-    n, m = orders.shape
-    ref = dict()
-    for i in range(n):
-        order = orders['order'].iloc[i]
-        item = orders['title'].iloc[i]
-        ref[order] = item
-
-    n, m = report.shape
-    for i in range(n):
-        title = np.nan
-        try:
-            if report['title'].iloc[i] is np.nan:
-                report['title'].iloc[i] = ref[report['order'].iloc[i]]
-        except KeyError:
-            print('key not found')
+    # Backfill missing titles from another row of the same order
+    mask = report['title'].isna()
+    if mask.any():
+        # Titled rows are just ~mask, no need for a second isna pass
+        orders = report.loc[~mask, ['order', 'title']].drop_duplicates('order')
+        ref = orders.set_index('order')['title']
+        report.loc[mask, 'title'] = report.loc[mask, 'order'].map(ref)
     return report
 
 app = Dash(__name__)
 
-df = pd.read_csv('reports/Transaction_report_20240101_20240913.csv', skiprows=[0,1,2,3,4,5,6,7,8,9,10])
+df = pd.read_csv(
+    'reports/Transaction_report_20240101_20240913.csv',
+    skiprows=[0,1,2,3,4,5,6,7,8,9,10],
+    usecols=['Transaction creation date', 'Type', 'Order number', 'Net amount', 'Item title', 'Buyer username'],
+    na_values=['--'],
+    dtype={'Net amount': 'float64', 'Order number': 'string'}
+)
 print(df.head())
 df = transform(df)
 head = df.head()
 fig = px.bar(df, x='date', y='net')
 
+# Rows sent to the browser per table page
+PAGE_SIZE = 50
+
 
 app.layout = dbc.Container([
     html.H1(children='ebay Dashboard'),
@@ -70,11 +70,14 @@ app.layout = dbc.Container([
     html.Div(
         children=[
         dash_table.DataTable(
-            data=df.to_dict('records'), 
             columns=[{"name": i, "id": i} for i in df.columns], 
             id='tbl', 
             editable=True,
-            cell_selectable=True
+            cell_selectable=True,
+            page_action='custom',
+            page_current=0,
+            page_size=PAGE_SIZE,
+            page_count=math.ceil(len(df) / PAGE_SIZE)
             ),
         html.Div(children=[dcc.Graph(figure=fig, id='example-graph')]),
         ],
@@ -90,6 +93,15 @@ def create_bar_chart(df, x_axis, y_axis):
     fig = px.bar(df, x=x_axis, y=y_axis)
     return fig
 
+@callback(
+        Output('tbl', 'data'),
+        Input('tbl', 'page_current'),
+        Input('tbl', 'page_size'),
+)
+def update_table_page(page_current, page_size):
+    start = page_current * page_size
+    return df.iloc[start:start + page_size].to_dict('records')
+
 @callback(Output('input-output', 'children'), Input('input-title', 'value'))
 def get_searched_table(value):
     return value
@@ -2,38 +2,44 @@ import pandas as pd
 import numpy as np
 import re
 
-csv = pd.read_csv('Transaction_report_20240101_20240801.csv')
-csv.replace('--', np.nan, inplace=True)
+
+def grouped_sum(keys, values):
+    """Sum values per distinct key with a single np.bincount pass"""
+    codes, uniques = pd.factorize(keys, sort=True)
+    valid = codes >= 0  # groupby drops missing keys
+    weights = values.fillna(0).to_numpy(np.float64)
+    totals = np.bincount(codes[valid], weights=weights[valid], minlength=len(uniques))
+    return pd.Series(totals, index=pd.Index(uniques, name=keys.name), name=values.name)
+
+csv = pd.read_csv(
+    'Transaction_report_20240101_20240801.csv',
+    usecols=['Transaction creation date', 'Type', 'Order number', 'Net amount', 'Item title'],
+    na_values=['--'],
+    dtype={'Net amount': 'float64', 'Order number': 'string', 'Item title': 'string[pyarrow]'}
+)
 report = csv[csv['Type'] != 'Payout']
-report = report[['Transaction creation date', 'Type', 'Order number', 'Net amount', 'Item title']]
+report = report[['Transaction creation date', 'Type', 'Order number', 'Net amount', 'Item title']].copy()
 # report.ffill(inplace=True)
 # report.bfill(inplace=True)
 report.rename(columns={'Transaction creation date': 'Date'}, inplace=True)
+report['Date'] = pd.to_datetime(report['Date'], format='%b %d, %Y', cache=True, errors='coerce')
 # print(report[report['Date'].str.contains('apr', case=False)])
 # report = report[~report['Date'].str.contains('apr', case=False)]
-orders = report[report['Type'] == 'Order']
-n, m = orders.shape
-ref = dict()
-for i in range(n):
-    order = orders['Order number'].iloc[i]
-    item = orders['Item title'].iloc[i]
-    ref[order] = item
-
-n, m = report.shape
-for i in range(n):
-    title = np.nan
-    try:
-        if report['Item title'].iloc[i] is np.nan:
-            report['Item title'].iloc[i] = ref[report['Order number'].iloc[i]]
-    except KeyError:
-        print('key not found')
+mask = report['Item title'].isna()
+# Only build the order lookup when there is something to backfill
+if mask.any():
+    orders = report.loc[(report['Type'] == 'Order') & ~mask, ['Order number', 'Item title']]
+    orders = orders.drop_duplicates('Order number')
+    ref = orders.set_index('Order number')['Item title']
+    report.loc[mask, 'Item title'] = report.loc[mask, 'Order number'].map(ref)
 print(report)
 
-cabi = report[report['Item title'].str.contains('cabi', case=False, na=False)]
+cabi = report[report['Item title'].str.contains('cabi', case=False, regex=False, na=False)]
 # print(cabi.to_string())
-bydate = cabi.groupby(['Date'])['Net amount'].sum()
+bydate = grouped_sum(cabi['Date'], cabi['Net amount'])
 # print(bydate)
-res = cabi.groupby(['Item title'])['Net amount'].sum()
+cabi = cabi.assign(**{'Item title': cabi['Item title'].astype('category')})
+res = grouped_sum(cabi['Item title'], cabi['Net amount'])
 # print(sum(res), sum(res)/2)
 
 # res = report[report['Type'] == 'Payout']
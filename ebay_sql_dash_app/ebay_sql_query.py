@@ -1,59 +1,70 @@
-from dash import Dash, html, dcc, dash_table, Input, Output, State
+from dash import Dash, html, dcc, dash_table, Input, Output, State, no_update
+from flask_caching import Cache
 import pandas as pd
-import sqlite3
-import io
+import duckdb
+import math
 import base64
+import hashlib
 import re
+import threading
+from collections import OrderedDict
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import dash_bootstrap_components as dbc
 
-# Initialize the Dash app
-app = Dash(__name__)
+# Initialize the Dash app (the results table is created by callbacks)
+app = Dash(__name__, suppress_callback_exceptions=True)
+
+# Rows sent to the browser per results page
+PAGE_SIZE = 200
+
+# Cache for query results, keyed by query text and upload version
+cache = Cache(app.server, config={'CACHE_TYPE': 'SimpleCache'})
 
 # Global variables to maintain state
 class DataStore:
     def __init__(self):
         self.df = pd.DataFrame()
-        # Create a persisted in-memory SQLite database
-        self.db_path = 'file::memory:?cache=shared'
+        # In-memory DuckDB database that queries self.df in place
         self._connection = None
+        # DuckDB connections must not be used from several threads at once
+        self._lock = threading.Lock()
         self.columns = []
         self.original_columns = {}  # Store mapping of original to cleaned names
+        self.result_df = pd.DataFrame()  # Full result behind the paged results table
+        self.version = 0  # Bumped on every upload so cached query results expire
 
     def get_connection(self):
-        """Get or create a connection to the shared in-memory database"""
+        """Get or create a connection to the in-memory database"""
         if self._connection is None:
-            self._connection = sqlite3.connect(
-                self.db_path, 
-                uri=True,
-                check_same_thread=False
-            )
+            self._connection = duckdb.connect()
         return self._connection
 
     def create_table(self, df):
         """Create the data table with the provided DataFrame"""
-        conn = self.get_connection()
-        df.to_sql('data', conn, index=False, if_exists='replace')
+        with self._lock:
+            conn = self.get_connection()
+            # Expose the DataFrame as a view over its own columns rather than
+            # copying every row into a second row store
+            conn.register('data', df)
+            self.version += 1
+
+    def query(self, query):
+        """Run a query against the data table and return a DataFrame"""
+        with self._lock:
+            return self.get_connection().execute(query).df()
 
 data_store = DataStore()
 
-def clean_column_name(column):
-    """Clean a column name to make it SQL-friendly and readable"""
-    # Convert to lowercase
-    name = str(column).lower()
-    
-    # Remove special characters and extra spaces
-    name = re.sub(r'[^a-z0-9\s]', ' ', name)
-    
-    # Replace multiple spaces with single space
-    name = re.sub(r'\s+', ' ', name)
-    
-    # Split on spaces and get meaningful words
-    words = name.split()
-    
+# Patterns and filler words used when cleaning column names
+_RE_NONALNUM = re.compile(r'[^a-z0-9\s]')
+FILLER_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with'})
+
+def join_name_words(words):
+    """Join cleaned words into a column name, dropping filler words"""
     # Remove common filler words
-    filler_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with'}
-    words = [w for w in words if w not in filler_words]
+    words = [w for w in words if w not in FILLER_WORDS]
     
     # If no words left after cleaning, return 'column'
     if not words:
@@ -72,16 +83,21 @@ def clean_column_names(df):
     """Clean all column names in the DataFrame and return mapping"""
     original_names = {}
     new_names = []
+    suffixes = {}  # last suffix tried for each base name
     
-    for col in df.columns:
-        clean_name = clean_column_name(col)
-        
-        # Handle duplicate cleaned names
+    # Lowercase, strip special characters and split every header in one pass
+    words = df.columns.astype(str).str.lower().str.replace(_RE_NONALNUM, ' ', regex=True).str.split()
+    cleaned = [join_name_words(w) for w in words]
+    
+    for col, clean_name in zip(df.columns, cleaned):
+        # Handle duplicate cleaned names, probing against the dict of names
+        # already assigned and resuming from the last suffix for this base
         base_name = clean_name
-        counter = 1
-        while clean_name in new_names:
-            clean_name = f"{base_name}_{counter}"
+        counter = suffixes.get(base_name, 0)
+        while clean_name in original_names:
             counter += 1
+            clean_name = f"{base_name}_{counter}"
+        suffixes[base_name] = counter
         
         new_names.append(clean_name)
         original_names[clean_name] = col
@@ -141,12 +157,17 @@ def create_result_component(result_df):
         ])
     
     else:
-        # Return regular DataTable for tabular results
+        # Keep the full result server-side and only ship the first page;
+        # later pages are served by update_results_page
+        data_store.result_df = result_df
         return dash_table.DataTable(
             id='results-table',
             columns=[{"name": i, "id": i} for i in result_df.columns],
-            data=result_df.to_dict('records'),
-            page_size=200,
+            data=result_df.iloc[:PAGE_SIZE].to_dict('records'),
+            page_action='custom',
+            page_current=0,
+            page_size=PAGE_SIZE,
+            page_count=math.ceil(len(result_df) / PAGE_SIZE),
             style_table={'overflowX': 'auto'},
             style_cell={
                 'padding': '10px',
@@ -158,6 +179,34 @@ def create_result_component(result_df):
             }
         )
 
+# Parsed uploads keyed by content digest, oldest first
+_parsed_csvs = OrderedDict()
+
+# eBay reports write '--' for empty cells; treat it as null while parsing
+CSV_CONVERT_OPTIONS = pacsv.ConvertOptions(
+    null_values=pacsv.ConvertOptions().null_values + ['--'],
+    strings_can_be_null=True
+)
+
+def parse_csv(decoded, max_entries=8):
+    """Parse decoded CSV bytes, reusing the result for repeated uploads"""
+    digest = hashlib.blake2b(decoded, digest_size=16).digest()
+    if digest in _parsed_csvs:
+        _parsed_csvs.move_to_end(digest)
+        return _parsed_csvs[digest]
+    
+    table = pacsv.read_csv(pa.BufferReader(decoded), convert_options=CSV_CONVERT_OPTIONS)
+    df = table.to_pandas(types_mapper=pd.ArrowDtype)
+    _parsed_csvs[digest] = df
+    if len(_parsed_csvs) > max_entries:
+        _parsed_csvs.popitem(last=False)
+    return df
+
+@cache.memoize(timeout=300)
+def execute_query(query, data_version):
+    """Run a query against the data table, memoized per upload version"""
+    return data_store.query(query)
+
 def validate_csv(contents, filename, max_size_mb=10):
     """Validate CSV file contents and return DataFrame if valid"""
     try:
@@ -174,19 +223,19 @@ def validate_csv(contents, filename, max_size_mb=10):
             return None, None, f"File size ({file_size_mb:.1f}MB) exceeds maximum allowed size ({max_size_mb}MB)"
         
         # Decode and read file contents
-        df = pd.read_csv(io.StringIO(decoded.decode('utf-8')))
+        df = parse_csv(decoded)
         
         # Validation checks
         if df.empty:
             return None, None, "The CSV file is empty"
         
-        # Check for unlabeled columns
-        unnamed_cols = df.columns.str.contains('^Unnamed:', na=False).any()
+        # Check for unlabeled columns (Arrow keeps blank headers as '')
+        unnamed_cols = (df.columns.str.contains('^Unnamed:', na=False) | (df.columns == '')).any()
         if unnamed_cols:
             return None, None, "CSV must have labeled columns"
         
-        # Clean column names
-        df, original_names = clean_column_names(df)
+        # Clean column names on a shallow copy so the cached frame keeps its headers
+        df, original_names = clean_column_names(df.copy(deep=False))
         
         # Generate column mapping message
         # mapping_message = "Column names have been cleaned:\n" + \
@@ -318,8 +367,10 @@ def process_upload(contents, filename):
         'mt-3 text-sm text-green-600',
         ', '.join(df.columns),
         'SELECT * FROM data LIMIT 5',
-        create_result_component(df.head()),
-        f'Showing first 5 rows of {len(df)} total rows'
+        # The table is only built once a query is run
+        html.Div('Click Run Query to see the data.',
+                 className='text-sm text-gray-600'),
+        f'{len(df)} rows ready to query'
     )
 
 # Callback for query execution
@@ -333,13 +384,11 @@ def process_upload(contents, filename):
 )
 def run_query(n_clicks, query):
     if not query:
-        return dash.no_update, '', dash.no_update
+        return no_update, '', no_update
     
     try:
-        # Use the shared connection
-        conn = data_store.get_connection()
-        # Execute query and get results
-        result_df = pd.read_sql_query(query, conn)
+        # Execute query and get results, reusing them for repeat runs
+        result_df = execute_query(query, data_store.version)
         
         # Create appropriate result component
         result_component = create_result_component(result_df)
@@ -361,6 +410,17 @@ def run_query(n_clicks, query):
             f'Showing first 5 rows of {len(data_store.df)} total rows'
         )
 
+# Callback for results table paging
+@app.callback(
+    Output('results-table', 'data'),
+    Input('results-table', 'page_current'),
+    State('results-table', 'page_size'),
+    prevent_initial_call=True
+)
+def update_results_page(page_current, page_size):
+    start = page_current * page_size
+    return data_store.result_df.iloc[start:start + page_size].to_dict('records')
+
 # Add Tailwind CSS
 app.index_string = '''
 <!DOCTYPE html>
@@ -1,15 +1,42 @@
 import dash
 from dash import dcc, html, Input, Output, State, dash_table
+from dash.dash_table import FormatTemplate
+from flask_caching import Cache
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import base64
+import hashlib
 import io
 import json
 
-# Initialize the Dash app
-app = dash.Dash(__name__, suppress_callback_exceptions=True)
+from table_filter import apply_filter_query
+
+# Initialize the Dash app, gzip/brotli-compressing responses (needs flask-compress)
+app = dash.Dash(__name__, suppress_callback_exceptions=True, compress=True)
+
+# Server-side cache for the processed uploads; the browser only holds its key.
+# No file-count threshold: pruning drops the entries that never expire first,
+# and those are the uploads
+cache = Cache(app.server, config={
+    'CACHE_TYPE': 'FileSystemCache',
+    'CACHE_DIR': '/tmp/dash-cache',
+    'CACHE_THRESHOLD': 0
+})
+
+# Filtered frames, one per date range and table filter, bounded separately so
+# they cannot push the uploads out
+filtered_cache = Cache(app.server, config={
+    'CACHE_TYPE': 'FileSystemCache',
+    'CACHE_DIR': '/tmp/dash-cache-filtered',
+    'CACHE_THRESHOLD': 200
+})
 
 # Define theme colors
 DARK_THEME = {
@@ -32,8 +59,8 @@ LIGHT_THEME = {
     'accent': '#2980b9'
 }
 
-# Define numeric columns globally
-numeric_columns = [
+# Define numeric columns globally, a frozenset so membership checks are O(1)
+numeric_columns = frozenset([
     'eBay collected tax', 'Item price', 'Quantity', 'Item subtotal',
     'Shipping and handling', 'Seller collected tax', 'Discount',
     'Gross amount', 'Final Value Fee - fixed', 'Final Value Fee - variable',
@@ -41,8 +68,38 @@ numeric_columns = [
     'International fee', 'Deposit processing fee', 'Regulatory operating fee',
     'Promoted Listing Standard fee', 'Charity donation', 'Shipping labels',
     'Payment Dispute Fee', 'Expenses', 'Refunds', 'Order earnings'
+])
+
+# Fee columns summed into 'Total Fees'
+fee_columns = [
+    'Final Value Fee - fixed', 'Final Value Fee - variable',
+    'Below standard performance fee', 'Very high "item not as described" fee',
+    'International fee', 'Deposit processing fee', 'Regulatory operating fee',
+    'Promoted Listing Standard fee'
+]
+
+# Points above which the sales trend line is drawn with WebGL
+WEBGL_THRESHOLD = 1000
+
+# Currency symbols and separators stripped from numeric columns
+CURRENCY_CHARS = str.maketrans('', '', '$,€£¥ ')
+
+# Identifier and address columns, read as text so they store cleanly
+text_columns = [
+    'Order number', 'Item ID', 'Item title', 'Buyer name', 'Ship to city',
+    'Ship to province/region/state', 'Ship to zip', 'Ship to country',
+    'Transaction currency', 'Payout currency'
 ]
 
+# Parse CSV uploads in one pass: text columns stay text, eBay's '--'
+# placeholder is missing, and the order date is parsed as it is read
+CSV_CONVERT_OPTIONS = pacsv.ConvertOptions(
+    column_types={col: pa.string() for col in text_columns},
+    null_values=pacsv.ConvertOptions().null_values + ['--'],
+    strings_can_be_null=True,
+    timestamp_parsers=[pacsv.ISO8601, '%b %d, %Y']
+)
+
 # Layout
 app.layout = html.Div([
     # Theme Store
@@ -94,6 +151,9 @@ app.layout = html.Div([
             # Hidden div to store the uploaded data
             dcc.Store(id='stored-data'),
             
+            # Upload key plus the active date filters, shared by the data callbacks
+            dcc.Store(id='filter-key'),
+            
             # Main Dashboard Content (initially hidden)
             html.Div(
                 id='dashboard-content',
@@ -102,47 +162,49 @@ app.layout = html.Div([
                     # Feature Selection
                     html.Div([
                         html.H4('Select Features to Display'),
-                        dcc.Checklist(
+                        dcc.Dropdown(
                             id='feature-selector',
                             options=[
-                                {'label': ' Order Date', 'value': 'Order creation date'},
-                                {'label': ' Order Number', 'value': 'Order number'},
-                                {'label': ' Item ID', 'value': 'Item ID'},
-                                {'label': ' Item Title', 'value': 'Item title'},
-                                {'label': ' Buyer Name', 'value': 'Buyer name'},
-                                {'label': ' Ship to City', 'value': 'Ship to city'},
-                                {'label': ' Ship to State', 'value': 'Ship to province/region/state'},
-                                {'label': ' Ship to Zip', 'value': 'Ship to zip'},
-                                {'label': ' Ship to Country', 'value': 'Ship to country'},
-                                {'label': ' Currency', 'value': 'Transaction currency'},
-                                {'label': ' eBay Tax', 'value': 'eBay collected tax'},
-                                {'label': ' Item Price', 'value': 'Item price'},
-                                {'label': ' Quantity', 'value': 'Quantity'},
-                                {'label': ' Item Subtotal', 'value': 'Item subtotal'},
-                                {'label': ' Shipping Cost', 'value': 'Shipping and handling'},
-                                {'label': ' Seller Tax', 'value': 'Seller collected tax'},
-                                {'label': ' Discount', 'value': 'Discount'},
-                                {'label': ' Payout Currency', 'value': 'Payout currency'},
-                                {'label': ' Gross Amount', 'value': 'Gross amount'},
-                                {'label': ' FVF Fixed', 'value': 'Final Value Fee - fixed'},
-                                {'label': ' FVF Variable', 'value': 'Final Value Fee - variable'},
-                                {'label': ' Below Standard Fee', 'value': 'Below standard performance fee'},
-                                {'label': ' INAD Fee', 'value': 'Very high "item not as described" fee'},
-                                {'label': ' International Fee', 'value': 'International fee'},
-                                {'label': ' Processing Fee', 'value': 'Deposit processing fee'},
-                                {'label': ' Operating Fee', 'value': 'Regulatory operating fee'},
-                                {'label': ' Promoted Fee', 'value': 'Promoted Listing Standard fee'},
-                                {'label': ' Charity', 'value': 'Charity donation'},
-                                {'label': ' Shipping Labels', 'value': 'Shipping labels'},
-                                {'label': ' Dispute Fee', 'value': 'Payment Dispute Fee'},
-                                {'label': ' Expenses', 'value': 'Expenses'},
-                                {'label': ' Refunds', 'value': 'Refunds'},
-                                {'label': ' Order Earnings', 'value': 'Order earnings'}
+                                {'label': 'Order Date', 'value': 'Order creation date'},
+                                {'label': 'Order Number', 'value': 'Order number'},
+                                {'label': 'Item ID', 'value': 'Item ID'},
+                                {'label': 'Item Title', 'value': 'Item title'},
+                                {'label': 'Buyer Name', 'value': 'Buyer name'},
+                                {'label': 'Ship to City', 'value': 'Ship to city'},
+                                {'label': 'Ship to State', 'value': 'Ship to province/region/state'},
+                                {'label': 'Ship to Zip', 'value': 'Ship to zip'},
+                                {'label': 'Ship to Country', 'value': 'Ship to country'},
+                                {'label': 'Currency', 'value': 'Transaction currency'},
+                                {'label': 'eBay Tax', 'value': 'eBay collected tax'},
+                                {'label': 'Item Price', 'value': 'Item price'},
+                                {'label': 'Quantity', 'value': 'Quantity'},
+                                {'label': 'Item Subtotal', 'value': 'Item subtotal'},
+                                {'label': 'Shipping Cost', 'value': 'Shipping and handling'},
+                                {'label': 'Seller Tax', 'value': 'Seller collected tax'},
+                                {'label': 'Discount', 'value': 'Discount'},
+                                {'label': 'Payout Currency', 'value': 'Payout currency'},
+                                {'label': 'Gross Amount', 'value': 'Gross amount'},
+                                {'label': 'FVF Fixed', 'value': 'Final Value Fee - fixed'},
+                                {'label': 'FVF Variable', 'value': 'Final Value Fee - variable'},
+                                {'label': 'Below Standard Fee', 'value': 'Below standard performance fee'},
+                                {'label': 'INAD Fee', 'value': 'Very high "item not as described" fee'},
+                                {'label': 'International Fee', 'value': 'International fee'},
+                                {'label': 'Processing Fee', 'value': 'Deposit processing fee'},
+                                {'label': 'Operating Fee', 'value': 'Regulatory operating fee'},
+                                {'label': 'Promoted Fee', 'value': 'Promoted Listing Standard fee'},
+                                {'label': 'Charity', 'value': 'Charity donation'},
+                                {'label': 'Shipping Labels', 'value': 'Shipping labels'},
+                                {'label': 'Dispute Fee', 'value': 'Payment Dispute Fee'},
+                                {'label': 'Expenses', 'value': 'Expenses'},
+                                {'label': 'Refunds', 'value': 'Refunds'},
+                                {'label': 'Order Earnings', 'value': 'Order earnings'}
                             ],
                             value=['Order creation date', 'Order number', 'Item title', 'Gross amount', 'Order earnings'],
-                            inline=True,
-                            className='feature-checklist'
-                        )
+                            multi=True,
+                            placeholder='Select features'
+                        ),
+                        # The selected features the summary and trend depend on
+                        dcc.Store(id='stat-features')
                     ], className='section-container'),
                     
                     # Filters Section
@@ -193,9 +255,7 @@ app.layout = html.Div([
                             },
                             page_size=10,
                             sort_action='native',
-                            filter_action='native',
-                            derived_virtual_data=[],
-                            derived_virtual_indices=[]
+                            filter_action='native'
                         ),
                         html.Div([
                             html.Button(
@@ -223,7 +283,9 @@ app.layout = html.Div([
                     # Sales Trend Graph
                     html.Div([
                         html.H4('Sales Trend'),
-                        dcc.Graph(id='sales-trend')
+                        dcc.Graph(id='sales-trend'),
+                        # Trend figure before theme colors are applied
+                        dcc.Store(id='sales-trend-figure')
                     ], className='section-container')
                 ]
             )
@@ -231,77 +293,103 @@ app.layout = html.Div([
     )
 ])
 
+def get_df(key):
+    """Load the processed DataFrame for an upload key from the cache"""
+    return cache.get(key) if key else None
+
+def daily_totals(df):
+    """Gross amount and earnings per day, with each day's first and last order time"""
+    grouped = df.groupby(df['Order creation date'].dt.normalize())
+    daily = grouped[['Gross amount', 'Order earnings']].sum()
+    daily['first_order'] = grouped['Order creation date'].min()
+    daily['last_order'] = grouped['Order creation date'].max()
+    return daily.reset_index()
+
+def filter_dates(df, start_date, end_date, selected_month_year):
+    """Apply the date range and month-year filters to a frame"""
+    # Date filtering
+    if start_date and end_date:
+        df = df[df['Order creation date'].between(start_date, end_date)]
+    
+    # Month-year filtering
+    if selected_month_year:
+        df = df[df['month_year'] == selected_month_year]
+    
+    return df
+
+@filtered_cache.memoize(timeout=300)
+def load_filtered(filter_key, filter_query=None):
+    """Processed DataFrame with the filters in filter_key and an optional
+    data table filter_query applied"""
+    key, start_date, end_date, selected_month_year = json.loads(filter_key)
+    df = get_df(key)
+    if df is None:
+        return None
+    df = filter_dates(df, start_date, end_date, selected_month_year)
+    if filter_query:
+        df = apply_filter_query(df, filter_query)
+    return df
+
+def get_filtered(filter_key, filter_query=None):
+    """Filtered frame for the data callbacks; a table filter that cannot be
+    evaluated is logged and skipped, leaving the date-filtered rows"""
+    try:
+        return load_filtered(filter_key, filter_query)
+    except ValueError as e:
+        app.logger.warning('Skipping table filter %r: %s', filter_query, e)
+        return load_filtered(filter_key)
+
 def parse_contents(contents, filename):
     content_type, content_string = contents.split(',')
     decoded = base64.b64decode(content_string)
     
     try:
         if 'csv' in filename:
-            df = pd.read_csv(io.StringIO(decoded.decode('utf-8')))
+            df = pacsv.read_csv(pa.BufferReader(decoded),
+                                convert_options=CSV_CONVERT_OPTIONS).to_pandas(
+                coerce_temporal_nanoseconds=True
+            )
         elif 'xls' in filename:
-            df = pd.read_excel(io.BytesIO(decoded))
+            df = pd.read_excel(io.BytesIO(decoded),
+                               dtype={col: str for col in text_columns})
         else:
             return None, f'Unsupported file type: {filename}. Please upload a CSV or Excel file.'
         
-        # Convert date column to datetime
-        df['Order creation date'] = pd.to_datetime(df['Order creation date'])
+        # Convert date column to datetime unless it was parsed on read
+        if not is_datetime64_any_dtype(df['Order creation date']):
+            df['Order creation date'] = pd.to_datetime(df['Order creation date'])
         
         # Convert numeric columns, removing any currency symbols
-        numeric_columns = [
-            'eBay collected tax', 'Item price', 'Quantity', 'Item subtotal',
-            'Shipping and handling', 'Seller collected tax', 'Discount',
-            'Gross amount', 'Final Value Fee - fixed', 'Final Value Fee - variable',
-            'Below standard performance fee', 'Very high "item not as described" fee',
-            'International fee', 'Deposit processing fee', 'Regulatory operating fee',
-            'Promoted Listing Standard fee', 'Charity donation', 'Shipping labels',
-            'Payment Dispute Fee', 'Expenses', 'Refunds', 'Order earnings'
-        ]
-        
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(
-                    df[col].astype(str).str.replace(r'[^\d.-]', '', regex=True), 
-                    errors='coerce'
-                ).fillna(0)  # Replace NaN with 0 for numeric columns
+        for col in [col for col in df.columns if col in numeric_columns]:
+            if is_numeric_dtype(df[col]):
+                # Already parsed as numbers, nothing to strip
+                df[col] = df[col].fillna(0)
+                continue
+            df[col] = pd.to_numeric(
+                df[col].astype(str).str.translate(CURRENCY_CHARS), 
+                errors='coerce'
+            ).fillna(0)  # Replace NaN with 0 for numeric columns
         
         # Replace '--' with None for easier processing
         df['Item title'] = df['Item title'].replace('--', None)
         
-        # For each Order number, get the first non-null Item title
-        title_mapping = df[
-            (df['Order number'].notna()) & 
-            (df['Item title'].notna())
-        ].groupby('Order number')['Item title'].first()
-        
-        # Apply the mapping to all rows with matching Order numbers
-        df.loc[df['Order number'].notna(), 'Item title'] = df['Order number'].map(title_mapping)
+        # Give every row of an order that order's first non-null Item title,
+        # rows without an Order number keep their own title
+        df['Item title'] = df.groupby('Order number', sort=False)['Item title'].transform(
+            'first'
+        ).fillna(df['Item title'])
         
-        # Replace None back with '--' for display
-        df['Item title'] = df['Item title'].fillna('--')
+        # Fill missing text values (including titles) with '--' for display
+        df.fillna({col: '--' for col in text_columns}, inplace=True)
         
-        # Fill NaN values appropriately
-        df['Order number'] = df['Order number'].fillna('--')
-        df['Item ID'] = df['Item ID'].fillna('--')
-        df['Buyer name'] = df['Buyer name'].fillna('--')
-        df['Ship to city'] = df['Ship to city'].fillna('--')
-        df['Ship to province/region/state'] = df['Ship to province/region/state'].fillna('--')
-        df['Ship to zip'] = df['Ship to zip'].fillna('--')
-        df['Ship to country'] = df['Ship to country'].fillna('--')
-        df['Transaction currency'] = df['Transaction currency'].fillna('--')
-        df['Payout currency'] = df['Payout currency'].fillna('--')
+        # Text columns repeat a lot, store them as categories
+        df = df.astype({col: 'category' for col in text_columns if col in df.columns})
         
         # Calculate any additional columns if needed
-        fee_columns = [
-            'Final Value Fee - fixed', 'Final Value Fee - variable',
-            'Below standard performance fee', 'Very high "item not as described" fee',
-            'International fee', 'Deposit processing fee', 'Regulatory operating fee',
-            'Promoted Listing Standard fee'
-        ]
-        
         df['Total Fees'] = df[fee_columns].sum(axis=1)
         
-        # Format the date column for CSV export
-        df['Order creation date'] = df['Order creation date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        # Month-year label used by the month filter
+        df['month_year'] = df['Order creation date'].dt.strftime('%B %Y').astype('category')
         
         return df, f'Successfully loaded {filename}'
     except Exception as e:
@@ -322,28 +410,100 @@ def update_output(contents, filename):
     if contents is None:
         return None, 'No file uploaded yet.', {'display': 'none'}, None, None, []
     
+    # Keep the data server-side, keyed by a hash of the upload
+    data = hashlib.sha1(contents.encode()).hexdigest()
+    
+    # The same file was uploaded before, skip parsing it again
+    summary = cache.get(f'{data}:summary')
+    if summary is not None and cache.has(data) and cache.has(f'{data}:daily_totals'):
+        start_date, end_date, month_year_options = summary
+        return data, f'Successfully loaded {filename}', {'display': 'block'}, start_date, end_date, month_year_options
+    
     df, message = parse_contents(contents, filename)
     
     if df is not None:
-        # Create month-year options
-        df['Order creation date'] = pd.to_datetime(df['Order creation date'])
-        df['month_year'] = df['Order creation date'].dt.strftime('%B %Y')
-        month_year_options = sorted(
-            [{'label': my, 'value': my} for my in df['month_year'].unique()],
-            key=lambda x: pd.to_datetime(x['value'], format='%B %Y')
-        )
+        # Create month-year options, sorted with one vectorized date parse
+        months = df['month_year'].cat.categories
+        order = pd.to_datetime(months, format='%B %Y').argsort()
+        month_year_options = [{'label': months[i], 'value': months[i]} for i in order]
         
-        # Store the data as a JSON string
-        data = df.to_json(date_format='iso', orient='split')
+        cache.set(data, df, timeout=0)
+        
+        # Daily totals for the sales trend, so it never regroups the raw rows
+        daily = daily_totals(df)
+        daily['month_year'] = daily['Order creation date'].dt.strftime('%B %Y')
+        cache.set(f'{data}:daily_totals', daily, timeout=0)
         start_date = df['Order creation date'].min()
         end_date = df['Order creation date'].max()
+        cache.set(f'{data}:summary', (start_date, end_date, month_year_options), timeout=0)
         
         return data, message, {'display': 'block'}, start_date, end_date, month_year_options
     else:
         return None, message, {'display': 'none'}, None, None, []
 
-# Callback for theme toggle
-@app.callback(
+# Callback for theme toggle (runs in the browser, it only builds styles)
+app.clientside_callback(
+    """
+    function(n_clicks, currentTheme) {
+        const themes = %s;
+        if (n_clicks == null) {
+            currentTheme = 'light';
+        } else {
+            currentTheme = currentTheme === 'light' ? 'dark' : 'light';
+        }
+        const theme = currentTheme === 'dark' ? themes.dark : themes.light;
+        const border = `1px solid ${theme.border}`;
+        
+        // Main container style
+        const containerStyle = {
+            backgroundColor: theme.background,
+            color: theme.text,
+            minHeight: '100vh',
+            padding: '20px'
+        };
+        
+        // Data table styles
+        const tableDataStyle = {
+            backgroundColor: theme.paper,
+            color: theme.text,
+            border: border
+        };
+        const tableHeaderStyle = {
+            backgroundColor: theme.paper,
+            color: theme.text,
+            border: border,
+            fontWeight: 'bold'
+        };
+        
+        // Upload component style
+        const uploadStyle = {
+            width: '100%%',
+            height: '60px',
+            lineHeight: '60px',
+            borderWidth: '1px',
+            borderStyle: 'dashed',
+            borderRadius: '5px',
+            textAlign: 'center',
+            margin: '10px 0',
+            backgroundColor: theme.paper,
+            borderColor: theme.border,
+            color: theme.text
+        };
+        
+        // Theme toggle button style
+        const toggleStyle = {
+            backgroundColor: theme.paper,
+            color: theme.text,
+            border: border,
+            padding: '10px 20px',
+            borderRadius: '5px',
+            cursor: 'pointer',
+            marginLeft: '20px'
+        };
+        
+        return [currentTheme, containerStyle, tableDataStyle, tableHeaderStyle, uploadStyle, toggleStyle];
+    }
+    """ % json.dumps({'dark': DARK_THEME, 'light': LIGHT_THEME}),
     [Output('theme-store', 'data'),
      Output('main-container', 'style'),
      Output('data-table', 'style_data'),
@@ -353,119 +513,71 @@ def update_output(contents, filename):
     Input('theme-toggle', 'n_clicks'),
     State('theme-store', 'data')
 )
-def toggle_theme(n_clicks, current_theme):
-    if n_clicks is None:
-        current_theme = 'light'
-    else:
-        current_theme = 'dark' if current_theme == 'light' else 'light'
-    
-    theme = DARK_THEME if current_theme == 'dark' else LIGHT_THEME
-    
-    # Main container style
-    container_style = {
-        'backgroundColor': theme['background'],
-        'color': theme['text'],
-        'minHeight': '100vh',
-        'padding': '20px'
-    }
-    
-    # Data table styles
-    table_data_style = {
-        'backgroundColor': theme['paper'],
-        'color': theme['text'],
-        'border': f'1px solid {theme["border"]}'
-    }
-    
-    table_header_style = {
-        'backgroundColor': theme['paper'],
-        'color': theme['text'],
-        'border': f'1px solid {theme["border"]}',
-        'fontWeight': 'bold'
-    }
-    
-    # Upload component style
-    upload_style = {
-        'width': '100%',
-        'height': '60px',
-        'lineHeight': '60px',
-        'borderWidth': '1px',
-        'borderStyle': 'dashed',
-        'borderRadius': '5px',
-        'textAlign': 'center',
-        'margin': '10px 0',
-        'backgroundColor': theme['paper'],
-        'borderColor': theme['border'],
-        'color': theme['text']
-    }
-    
-    # Theme toggle button style
-    toggle_style = {
-        'backgroundColor': theme['paper'],
-        'color': theme['text'],
-        'border': f'1px solid {theme["border"]}',
-        'padding': '10px 20px',
-        'borderRadius': '5px',
-        'cursor': 'pointer',
-        'marginLeft': '20px'
-    }
-    
-    return current_theme, container_style, table_data_style, table_header_style, upload_style, toggle_style
 
-# Callback for Data Table
+# Callback for the shared filter key
 @app.callback(
-    [Output('data-table', 'data'),
-     Output('data-table', 'columns')],
+    Output('filter-key', 'data'),
     [Input('stored-data', 'data'),
-     Input('feature-selector', 'value'),
      Input('date-range', 'start_date'),
      Input('date-range', 'end_date'),
      Input('month-year-selector', 'value')]
 )
-def update_table(stored_data, selected_features, start_date, end_date, selected_month_year):
+def compute_filter_key(stored_data, start_date, end_date, selected_month_year):
     if stored_data is None:
+        return None
+    return json.dumps([stored_data, start_date, end_date, selected_month_year])
+
+def column_spec(col):
+    """Data table column definition, numbers are formatted by the table itself"""
+    if col == 'Quantity':
+        return {'name': col, 'id': col, 'type': 'numeric'}
+    if col in numeric_columns:
+        return {'name': col, 'id': col, 'type': 'numeric', 'format': FormatTemplate.money(2)}
+    if col == 'Order creation date':
+        return {'name': col, 'id': col, 'type': 'datetime'}
+    return {'name': col, 'id': col}
+
+# Callback narrowing the feature selection to what the summary and trend use,
+# so picking other columns doesn't re-run them
+app.clientside_callback(
+    """
+    function(features, current) {
+        const used = %s;
+        const picked = used.filter(col => (features || []).includes(col));
+        if (current && JSON.stringify(current) === JSON.stringify(picked)) {
+            return window.dash_clientside.no_update;
+        }
+        return picked;
+    }
+    """ % json.dumps(['Order creation date', 'Order number', 'Gross amount', 'Order earnings']),
+    Output('stat-features', 'data'),
+    Input('feature-selector', 'value'),
+    State('stat-features', 'data')
+)
+
+# Callback for Data Table
+@app.callback(
+    [Output('data-table', 'data'),
+     Output('data-table', 'columns')],
+    [Input('filter-key', 'data'),
+     Input('feature-selector', 'value')]
+)
+def update_table(filter_key, selected_features):
+    if filter_key is None:
         return [], []
     
-    df = pd.read_json(stored_data, orient='split')
-    df['Order creation date'] = pd.to_datetime(df['Order creation date'])
-    
-    # Date filtering
-    if start_date and end_date:
-        df = df[
-            (df['Order creation date'] >= start_date) & 
-            (df['Order creation date'] <= end_date)
-        ]
-    
-    # Month-year filtering
-    if selected_month_year:
-        month_year_date = pd.to_datetime(selected_month_year, format='%B %Y')
-        df = df[
-            (df['Order creation date'].dt.month == month_year_date.month) &
-            (df['Order creation date'].dt.year == month_year_date.year)
-        ]
+    df = get_filtered(filter_key)
+    if df is None:
+        return [], []
     
     # Feature filtering
     df = df[selected_features]
     
-    # Format date column
+    # Send the date as an ISO date, the table has no datetime format spec
     if 'Order creation date' in df.columns:
-        df['Order creation date'] = df['Order creation date'].dt.strftime('%Y-%m-%d')
-    
-    # Format numeric columns
-    numeric_columns = [
-        'eBay collected tax', 'Item price', 'Quantity', 'Item subtotal',
-        'Shipping and handling', 'Seller collected tax', 'Discount',
-        'Gross amount', 'Final Value Fee - fixed', 'Final Value Fee - variable',
-        'Below standard performance fee', 'Very high "item not as described" fee',
-        'International fee', 'Deposit processing fee', 'Regulatory operating fee',
-        'Promoted Listing Standard fee', 'Charity donation', 'Shipping labels',
-        'Payment Dispute Fee', 'Expenses', 'Refunds', 'Order earnings'
-    ]
-    
-    for col in numeric_columns:
-        if col in df.columns:
-            df[col] = df[col].round(2)
-    
-    columns = [{'name': i, 'id': i} for i in df.columns]
+        df = df.assign(**{'Order creation date': df['Order creation date'].dt.strftime('%Y-%m-%d')})
+    
+    columns = [column_spec(col) for col in df.columns]
     return df.to_dict('records'), columns
 
 # Callback for Export
@@ -480,78 +592,57 @@ def export_processed_data(n_clicks, stored_data):
         return None
     
     # Load the processed data
-    df = pd.read_json(stored_data, orient='split')
+    df = get_df(stored_data)
+    if df is None:
+        return None
     
     # Generate timestamp for filename
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     
+    # Write the CSV through Arrow, its writer is much faster than to_csv
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    i = table.schema.get_field_index('Order creation date')
+    dates = pc.cast(table.column(i), pa.timestamp('s'), safe=False)
+    table = table.set_column(i, 'Order creation date',
+                             pc.strftime(dates, format='%Y-%m-%d %H:%M:%S'))
+    buf = io.BytesIO()
+    pacsv.write_csv(table, buf)
+    
     # Return the processed data as CSV
-    return dcc.send_data_frame(
-        df.to_csv,
-        f'ebay_processed_data_{timestamp}.csv',
-        index=False
-    )
+    return dcc.send_string(buf.getvalue().decode('utf-8'), f'ebay_processed_data_{timestamp}.csv')
 
 # Callback for Summary Statistics
 @app.callback(
     Output('summary-stats', 'children'),
-    [Input('stored-data', 'data'),
-     Input('feature-selector', 'value'),
-     Input('date-range', 'start_date'),
-     Input('date-range', 'end_date'),
-     Input('month-year-selector', 'value'),
-     Input('data-table', 'derived_virtual_data'),
-     Input('data-table', 'derived_virtual_indices')]
+    [Input('filter-key', 'data'),
+     Input('stat-features', 'data'),
+     Input('data-table', 'filter_query')]
 )
-def update_summary_stats(stored_data, selected_features, start_date, end_date, 
-                        selected_month_year, filtered_rows, filtered_indices):
-    if stored_data is None:
+def update_summary_stats(filter_key, selected_features, filter_query):
+    if filter_key is None or selected_features is None:
         return []
     
-    # Load initial data
-    df = pd.read_json(stored_data, orient='split')
-    df['Order creation date'] = pd.to_datetime(df['Order creation date'])
-    
-    # Apply date filtering
-    if start_date and end_date:
-        df = df[
-            (df['Order creation date'] >= start_date) & 
-            (df['Order creation date'] <= end_date)
-        ]
-    
-    # Apply month-year filtering
-    if selected_month_year:
-        month_year_date = pd.to_datetime(selected_month_year, format='%B %Y')
-        df = df[
-            (df['Order creation date'].dt.month == month_year_date.month) &
-            (df['Order creation date'].dt.year == month_year_date.year)
-        ]
-    
-    # Apply table filtering
-    if filtered_rows and filtered_indices:
-        df = pd.DataFrame(filtered_rows)
-        if 'Order creation date' in df.columns:
-            df['Order creation date'] = pd.to_datetime(df['Order creation date'])
-        for col in df.columns:
-            if col in numeric_columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+    # Load filtered data, including the table's own filter
+    df = get_filtered(filter_key, filter_query)
+    if df is None:
+        return []
     
     stats = []
     
+    # Totals of every numeric column in one NumPy pass
+    total_columns = [col for col in df.columns if col in numeric_columns]
+    totals = dict(zip(
+        total_columns,
+        np.nansum(df[total_columns].to_numpy(dtype=np.float64), axis=0)
+    ))
+    
     # Financial Statistics
     if all(col in selected_features for col in ['Gross amount', 'Order earnings']):
         # Calculate the total fees - only include columns that exist in the dataframe
-        fee_columns = [
-            'Final Value Fee - fixed', 'Final Value Fee - variable',
-            'Below standard performance fee', 'Very high "item not as described" fee',
-            'International fee', 'Deposit processing fee', 'Regulatory operating fee',
-            'Promoted Listing Standard fee'
-        ]
-        available_fee_columns = [col for col in fee_columns if col in df.columns]
-        total_fees = df[available_fee_columns].sum().sum() if available_fee_columns else 0
+        total_fees = sum(totals[col] for col in fee_columns if col in totals)
         
-        total_gross = df['Gross amount'].sum()
-        total_earnings = df['Order earnings'].sum()
+        total_gross = totals['Gross amount']
+        total_earnings = totals['Order earnings']
         
         stats.extend([
             html.Div([
@@ -585,9 +676,10 @@ def update_summary_stats(stored_data, selected_features, start_date, end_date,
     
     # Order Statistics
     if 'Order number' in selected_features:
-        unique_orders = len(df[df['Order number'] != '--']['Order number'].unique())
+        has_order = (df['Order number'] != '--').to_numpy()
+        unique_orders = df.loc[has_order, 'Order number'].nunique()
         if unique_orders > 0 and 'Gross amount' in selected_features:
-            avg_order_value = df[df['Order number'] != '--']['Gross amount'].sum() / unique_orders
+            avg_order_value = np.nansum(df['Gross amount'].to_numpy(dtype=np.float64)[has_order]) / unique_orders
             stats.extend([
                 html.Div([
                     html.H5('Order Metrics'),
@@ -600,7 +692,8 @@ def update_summary_stats(stored_data, selected_features, start_date, end_date,
     if 'Order creation date' in selected_features:
         date_range = (df['Order creation date'].max() - df['Order creation date'].min()).days
         if 'Gross amount' in selected_features:
-            daily_avg_sales = df['Gross amount'].sum() / (date_range + 1) if date_range >= 0 else df['Gross amount'].sum()
+            total_gross = totals['Gross amount']
+            daily_avg_sales = total_gross / (date_range + 1) if date_range >= 0 else total_gross
             
             stats.extend([
                 html.Div([
@@ -614,56 +707,37 @@ def update_summary_stats(stored_data, selected_features, start_date, end_date,
 
 # Callback for Sales Trend
 @app.callback(
-    Output('sales-trend', 'figure'),
-    [Input('stored-data', 'data'),
-     Input('feature-selector', 'value'),
-     Input('date-range', 'start_date'),
-     Input('date-range', 'end_date'),
-     Input('month-year-selector', 'value'),
-     Input('data-table', 'derived_virtual_data'),
-     Input('data-table', 'derived_virtual_indices'),
-     Input('theme-store', 'data')]
+    Output('sales-trend-figure', 'data'),
+    [Input('filter-key', 'data'),
+     Input('stat-features', 'data'),
+     Input('data-table', 'filter_query')]
 )
-def update_sales_trend(stored_data, selected_features, start_date, end_date, 
-                      selected_month_year, filtered_rows, filtered_indices, theme):
-    if stored_data is None or 'Order creation date' not in selected_features or 'Gross amount' not in selected_features:
+def update_sales_trend(filter_key, selected_features, filter_query):
+    if (filter_key is None or selected_features is None
+            or 'Order creation date' not in selected_features
+            or 'Gross amount' not in selected_features):
         return go.Figure()
     
-    # Load and process data
-    df = pd.read_json(stored_data, orient='split')
-    df['Order creation date'] = pd.to_datetime(df['Order creation date'])
-    
-    # Apply date filtering
-    if start_date and end_date:
-        df = df[
-            (df['Order creation date'] >= start_date) & 
-            (df['Order creation date'] <= end_date)
-        ]
-    
-    # Apply month-year filtering
-    if selected_month_year:
-        month_year_date = pd.to_datetime(selected_month_year, format='%B %Y')
-        df = df[
-            (df['Order creation date'].dt.month == month_year_date.month) &
-            (df['Order creation date'].dt.year == month_year_date.year)
-        ]
-    
-    # Apply table filtering
-    if filtered_rows and filtered_indices:
-        df = pd.DataFrame(filtered_rows)
-        df['Order creation date'] = pd.to_datetime(df['Order creation date'])
-        for col in ['Gross amount', 'Order earnings']:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    # Group by date and calculate daily amounts
-    daily_data = df.groupby('Order creation date').agg({
-        'Gross amount': 'sum',
-        'Order earnings': 'sum' if 'Order earnings' in selected_features else 'sum'
-    }).reset_index()
+    stored_data, start_date, end_date, selected_month_year = json.loads(filter_key)
     
-    # Set theme-specific colors
-    theme_colors = DARK_THEME if theme == 'dark' else LIGHT_THEME
+    # Use the daily amounts computed at upload when the filters keep whole days
+    daily_data = None if filter_query else cache.get(f'{stored_data}:daily_totals')
+    if daily_data is not None and start_date and end_date:
+        first, last = daily_data['first_order'], daily_data['last_order']
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        if (((first < start) & (last >= start)) | ((first <= end) & (last > end))).any():
+            # The range cuts through a day, only the raw rows give its part
+            daily_data = None
+        else:
+            daily_data = daily_data[(first >= start) & (last <= end)]
+    if daily_data is not None:
+        daily_data = filter_dates(daily_data, None, None, selected_month_year)
+    else:
+        # Regroup the rows the table and summary use
+        df = get_filtered(filter_key, filter_query)
+        if df is None:
+            return go.Figure()
+        daily_data = daily_totals(df)
     
     # Create the figure
     fig = go.Figure()
@@ -672,13 +746,14 @@ def update_sales_trend(stored_data, selected_features, start_date, end_date,
     fig.add_trace(go.Bar(
         x=daily_data['Order creation date'],
         y=daily_data['Gross amount'],
-        name='Gross Sales',
-        marker_color=theme_colors['accent']
+        name='Gross Sales'
     ))
     
     # Add the line for earnings if selected
     if 'Order earnings' in selected_features:
-        fig.add_trace(go.Scatter(
+        # SVG lines get slow with many points, WebGL does not
+        scatter = go.Scattergl if len(daily_data) > WEBGL_THRESHOLD else go.Scatter
+        fig.add_trace(scatter(
             x=daily_data['Order creation date'],
             y=daily_data['Order earnings'],
             mode='lines',
@@ -689,29 +764,19 @@ def update_sales_trend(stored_data, selected_features, start_date, end_date,
             )
         ))
     
-    # Update layout with theme colors and improved formatting
+    # Update layout with improved formatting, theme colors are applied client-side
     title_text = 'Daily Sales Trend'
     if selected_month_year:
         title_text += f' - {selected_month_year}'
     
     fig.update_layout(
-        title=dict(
-            text=title_text,
-            font=dict(color=theme_colors['text'])
-        ),
-        plot_bgcolor=theme_colors['paper'],
-        paper_bgcolor=theme_colors['background'],
-        font_color=theme_colors['text'],
+        title=dict(text=title_text),
         xaxis=dict(
             title='Date',
-            gridcolor=theme_colors['border'],
-            zerolinecolor=theme_colors['border'],
             tickformat='%Y-%m-%d'
         ),
         yaxis=dict(
             title='Amount ($)',
-            gridcolor=theme_colors['border'],
-            zerolinecolor=theme_colors['border'],
             tickformat='$,.2f'
         ),
         showlegend=True,
@@ -731,6 +796,38 @@ def update_sales_trend(stored_data, selected_features, start_date, end_date,
     
     return fig
 
+# Callback to apply theme colors to the sales trend in the browser
+app.clientside_callback(
+    """
+    function(fig, currentTheme) {
+        if (!fig || !fig.data || !fig.data.length) {
+            return fig || {};
+        }
+        const themes = %s;
+        const theme = currentTheme === 'dark' ? themes.dark : themes.light;
+        const layout = fig.layout || {};
+        return {
+            ...fig,
+            data: fig.data.map(trace => trace.type === 'bar'
+                ? {...trace, marker: {...trace.marker, color: theme.accent}}
+                : trace),
+            layout: {
+                ...layout,
+                title: {...layout.title, font: {...(layout.title || {}).font, color: theme.text}},
+                plot_bgcolor: theme.paper,
+                paper_bgcolor: theme.background,
+                font: {...layout.font, color: theme.text},
+                xaxis: {...layout.xaxis, gridcolor: theme.border, zerolinecolor: theme.border},
+                yaxis: {...layout.yaxis, gridcolor: theme.border, zerolinecolor: theme.border}
+            }
+        };
+    }
+    """ % json.dumps({'dark': DARK_THEME, 'light': LIGHT_THEME}),
+    Output('sales-trend', 'figure'),
+    Input('sales-trend-figure', 'data'),
+    Input('theme-store', 'data')
+)
+
 # Add CSS for smooth theme transitions
 app.index_string = '''
 <!DOCTYPE html>
@@ -749,9 +846,6 @@ app.index_string = '''
                 padding: 20px;
                 border-radius: 5px;
             }
-            .feature-checklist label {
-                margin-right: 20px;
-            }
         </style>
     </head>
     <body>
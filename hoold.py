@@ -1,15 +1,42 @@
 import dash
 from dash import dcc, html, Input, Output, State, dash_table
+from flask_caching import Cache
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
+from functools import lru_cache
 import base64
+import hashlib
 import io
+import json
+import math
+import re
+
+from table_filter import apply_filter_query
 
 # Initialize the Dash app
 app = dash.Dash(__name__, suppress_callback_exceptions=True)
 
+# Server-side cache for the processed uploads; the browser only holds its key.
+# No file-count threshold: pruning drops the entries that never expire first,
+# and those are the uploads
+cache = Cache(app.server, config={
+    'CACHE_TYPE': 'FileSystemCache',
+    'CACHE_DIR': '/tmp/hoold-cache',
+    'CACHE_THRESHOLD': 0
+})
+
+# Filtered frames, one per date range and table filter, bounded separately so
+# they cannot push the uploads out
+filtered_cache = Cache(app.server, config={
+    'CACHE_TYPE': 'FileSystemCache',
+    'CACHE_DIR': '/tmp/hoold-cache-filtered',
+    'CACHE_THRESHOLD': 200
+})
+
 # Define theme colors
 DARK_THEME = {
     'background': '#1a1a1a',
@@ -31,6 +58,29 @@ LIGHT_THEME = {
     'accent': '#2980b9'
 }
 
+# Date format of eBay transaction reports, e.g. 'Aug 1, 2024'
+DATE_FORMAT = '%b %d, %Y'
+
+# Anything that is not part of a number, stripped from Net amount
+CURRENCY_RE = re.compile(r'[^\d.-]')
+
+# Features that have a summary section
+SUMMARY_FEATURES = frozenset([
+    'Net amount', 'Type', 'Buyer username', 'Transaction creation date'
+])
+
+# Rows parsed at a time from uploaded CSVs
+CSV_CHUNK_ROWS = 50_000
+
+# Low-cardinality text columns stored as categories
+CATEGORY_COLUMNS = ['Type', 'Buyer username', 'Item title']
+
+# Days above which the sales trend is drawn with WebGL
+WEBGL_THRESHOLD = 1000
+
+# Most points per sales trend trace; longer series are downsampled with LTTB
+MAX_TREND_POINTS = 2000
+
 # Layout
 app.layout = html.Div([
     # Theme Store
@@ -83,6 +133,9 @@ app.layout = html.Div([
             # Hidden div to store the uploaded data
             dcc.Store(id='stored-data'),
             
+            # Upload key plus the active date filters, shared by the data callbacks
+            dcc.Store(id='filter-key'),
+            
             # Main Dashboard Content (initially hidden)
             html.Div(
                 id='dashboard-content',
@@ -153,11 +206,15 @@ app.layout = html.Div([
                                 'backgroundColor': 'rgb(230, 230, 230)',
                                 'fontWeight': 'bold'
                             },
+                            # Paged, sorted and filtered server-side, so the browser
+                            # only ever holds the rows on screen
+                            page_current=0,
                             page_size=10,
-                            sort_action='native',
-                            filter_action='native',
-                            derived_virtual_data=[],
-                            derived_virtual_indices=[]
+                            page_action='custom',
+                            sort_action='custom',
+                            sort_by=[],
+                            filter_action='custom',
+                            filter_query=''
                         )
                     ], className='section-container'),
                     
@@ -178,39 +235,161 @@ app.layout = html.Div([
     )
 ])
 
+def get_df(key):
+    """Load the processed DataFrame for an upload key from the cache"""
+    return cache.get(key) if key else None
+
+def date_range_rows(dates, start_date, end_date):
+    """Rows with dates in [start_date, end_date], a slice when dates are sorted"""
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    index = pd.Index(dates)
+    
+    # Binary search on sorted dates, either direction
+    if index.is_monotonic_increasing:
+        return index.slice_indexer(start, end)
+    if index.is_monotonic_decreasing:
+        return index.slice_indexer(end, start)
+    return ((dates >= start) & (dates <= end)).to_numpy()
+
+def filter_dates(df, start_date, end_date, selected_month_year):
+    """Apply the date range and month-year filters to a frame"""
+    # Date filtering
+    if start_date and end_date:
+        df = df.iloc[date_range_rows(df['Transaction creation date'], start_date, end_date)]
+    
+    # Month-year filtering
+    if selected_month_year:
+        df = df[df['month_year'] == selected_month_year]
+    
+    return df
+
+@filtered_cache.memoize(timeout=300)
+def load_filtered(filter_key, filter_query=None):
+    """Processed DataFrame with the filters in filter_key and an optional
+    data table filter_query applied"""
+    key, start_date, end_date, selected_month_year = json.loads(filter_key)
+    df = get_df(key)
+    if df is None:
+        return None
+    df = filter_dates(df, start_date, end_date, selected_month_year)
+    if filter_query:
+        df = apply_filter_query(df, filter_query)
+    return df
+
+@lru_cache(maxsize=16)
+def _filtered_in_process(filter_key, filter_query):
+    # Raising keeps a missing upload out of the LRU, so a re-upload is seen
+    df = load_filtered(filter_key, filter_query)
+    if df is None:
+        raise KeyError(filter_key)
+    return df
+
+def get_filtered(filter_key, filter_query=None):
+    """Filtered frame for the data callbacks, held in process so the three
+    callbacks of one interaction skip re-reading the cache (do not mutate it).
+    A table filter that cannot be evaluated is logged and skipped, leaving
+    the date-filtered rows"""
+    try:
+        return _filtered_in_process(filter_key, filter_query or None)
+    except KeyError:
+        return None
+    except ValueError as e:
+        app.logger.warning('Skipping table filter %r: %s', filter_query, e)
+        return get_filtered(filter_key)
+
+def type_totals(df):
+    """Net amount sum and mean per Type, from np.bincount over the category codes"""
+    types = df['Type'].cat
+    codes = types.codes.to_numpy()
+    amounts = df['Net amount'].to_numpy(np.float64)
+    n_types = len(types.categories)
+    
+    # Missing amounts are skipped like pandas' sum/mean; types with no rows are left out
+    valid = (codes >= 0) & ~np.isnan(amounts)
+    sums = np.bincount(codes[valid], weights=amounts[valid], minlength=n_types)
+    counts = np.bincount(codes[valid], minlength=n_types)
+    rows = np.bincount(codes[codes >= 0], minlength=n_types)
+    
+    return {
+        name: {'sum': sums[i], 'mean': sums[i] / counts[i] if counts[i] else np.nan}
+        for i, name in enumerate(types.categories) if rows[i]
+    }
+
+def lttb_indices(x, y, n_out):
+    """Row positions kept by Largest-Triangle-Three-Buckets downsampling"""
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    
+    # First and last points are always kept, the rest is split into buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        
+        # Keep the point making the largest triangle with the last kept point
+        # and the next bucket's average
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+def convert_columns(df):
+    """Parse the date and Net amount columns of a report, or a chunk of one"""
+    # Convert date column to datetime, with the report's format when it matches
+    dates = df['Transaction creation date']
+    if not is_datetime64_any_dtype(dates):
+        try:
+            df['Transaction creation date'] = pd.to_datetime(dates, format=DATE_FORMAT)
+        except ValueError:
+            df['Transaction creation date'] = pd.to_datetime(dates)
+    
+    # Convert Net amount to numeric, removing any currency symbols
+    net = df['Net amount']
+    if not is_numeric_dtype(net):
+        df['Net amount'] = pd.to_numeric(net.astype(str).str.replace(CURRENCY_RE, '', regex=True), errors='coerce')
+    
+    return df
+
 def parse_contents(contents, filename):
     content_type, content_string = contents.split(',')
     decoded = base64.b64decode(content_string)
     
     try:
         if 'csv' in filename:
-            df = pd.read_csv(io.StringIO(decoded.decode('utf-8')))
+            # Read the bytes in chunks, converting each chunk's typed columns as it
+            # is parsed rather than holding the decoded text and the raw frame
+            chunks = pd.read_csv(io.BytesIO(decoded), chunksize=CSV_CHUNK_ROWS)
+            df = pd.concat([convert_columns(chunk) for chunk in chunks], ignore_index=True, copy=False)
         elif 'xls' in filename:
-            df = pd.read_excel(io.BytesIO(decoded))
+            df = convert_columns(pd.read_excel(io.BytesIO(decoded)))
         else:
             return None, f'Unsupported file type: {filename}. Please upload a CSV or Excel file.'
         
-        # Convert date column to datetime
-        df['Transaction creation date'] = pd.to_datetime(df['Transaction creation date'])
-        
-        # Convert Net amount to numeric, removing any currency symbols
-        df['Net amount'] = pd.to_numeric(df['Net amount'].astype(str).str.replace(r'[^\d.-]', '', regex=True), errors='coerce')
-        
         # Replace '--' with None for easier processing
         df['Item title'] = df['Item title'].replace('--', None)
         
         # For each Order number, get the first non-null Item title
-        title_mapping = df[
-            (df['Order number'].notna()) & 
-            (df['Item title'].notna())
-        ].groupby('Order number')['Item title'].first()
+        has_order = df['Order number'].notna()
+        title_mapping = df.loc[
+            has_order & df['Item title'].notna(), ['Order number', 'Item title']
+        ].drop_duplicates('Order number').set_index('Order number')['Item title']
         
         # Apply the mapping to all rows with matching Order numbers
-        df.loc[df['Order number'].notna(), 'Item title'] = df['Order number'].map(title_mapping)
+        df['Item title'] = df['Order number'].map(title_mapping).where(has_order, df['Item title'])
         
         # Replace None back with '--' for display
         df['Item title'] = df['Item title'].fillna('--')
         
+        # These repeat a lot, store them as categories
+        for col in CATEGORY_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        
         return df, f'Successfully loaded {filename}'
     except Exception as e:
         return None, f'Error processing {filename}: {str(e)}'
@@ -234,15 +413,31 @@ def update_output(contents, filename):
     df, message = parse_contents(contents, filename)
     
     if df is not None:
-        # Create month-year options
-        df['month_year'] = df['Transaction creation date'].dt.strftime('%B %Y')
+        # Month-year label used by the month filter and its options
+        df['month_year'] = df['Transaction creation date'].dt.strftime('%B %Y').astype('category')
         month_year_options = sorted(
             [{'label': my, 'value': my} for my in df['month_year'].unique()],
             key=lambda x: pd.to_datetime(x['value'], format='%B %Y')
         )
         
-        # Store the data as a JSON string
-        data = df.to_json(date_format='iso', orient='split')
+        # eBay exports newest first; sort anything unsorted the same way so
+        # date ranges can be sliced by binary search
+        dates = df['Transaction creation date']
+        if not (dates.is_monotonic_decreasing or dates.is_monotonic_increasing):
+            df = df.sort_values(
+                'Transaction creation date', ascending=False, kind='stable', ignore_index=True
+            )
+        
+        # Keep the data server-side, keyed by a hash of the upload
+        data = hashlib.sha1(contents.encode()).hexdigest()
+        cache.set(data, df, timeout=0)
+        
+        # Daily net totals for the sales trend, so it never regroups the raw rows
+        daily = df.groupby(df['Transaction creation date'].dt.normalize())[
+            'Net amount'
+        ].sum().reset_index()
+        daily['month_year'] = daily['Transaction creation date'].dt.strftime('%B %Y')
+        cache.set(f'{data}:daily', daily, timeout=0)
         start_date = df['Transaction creation date'].min()
         end_date = df['Transaction creation date'].max()
         
@@ -250,8 +445,69 @@ def update_output(contents, filename):
     else:
         return None, message, {'display': 'none'}, None, None, []
 
-# Callback for theme toggle
-@app.callback(
+# Callback for theme toggle (runs in the browser, it only builds styles)
+app.clientside_callback(
+    """
+    function(n_clicks, currentTheme) {
+        const themes = %s;
+        if (n_clicks == null) {
+            currentTheme = 'dark';
+        } else {
+            currentTheme = currentTheme === 'light' ? 'dark' : 'light';
+        }
+        const theme = currentTheme === 'dark' ? themes.dark : themes.light;
+        const border = `1px solid ${theme.border}`;
+        
+        // Main container style
+        const containerStyle = {
+            backgroundColor: theme.background,
+            color: theme.text,
+            minHeight: '100vh',
+            padding: '20px'
+        };
+        
+        // Data table styles
+        const tableDataStyle = {
+            backgroundColor: theme.paper,
+            color: theme.text,
+            border: border
+        };
+        const tableHeaderStyle = {
+            backgroundColor: theme.paper,
+            color: theme.text,
+            border: border,
+            fontWeight: 'bold'
+        };
+        
+        // Upload component style
+        const uploadStyle = {
+            width: '100%%',
+            height: '60px',
+            lineHeight: '60px',
+            borderWidth: '1px',
+            borderStyle: 'dashed',
+            borderRadius: '5px',
+            textAlign: 'center',
+            margin: '10px 0',
+            backgroundColor: theme.paper,
+            borderColor: theme.border,
+            color: theme.text
+        };
+        
+        // Theme toggle button style
+        const toggleStyle = {
+            backgroundColor: theme.paper,
+            color: theme.text,
+            border: border,
+            padding: '10px 20px',
+            borderRadius: '5px',
+            cursor: 'pointer',
+            marginLeft: '20px'
+        };
+        
+        return [currentTheme, containerStyle, tableDataStyle, tableHeaderStyle, uploadStyle, toggleStyle];
+    }
+    """ % json.dumps({'dark': DARK_THEME, 'light': LIGHT_THEME}),
     [Output('theme-store', 'data'),
      Output('main-container', 'style'),
      Output('data-table', 'style_data'),
@@ -261,99 +517,71 @@ def update_output(contents, filename):
     Input('theme-toggle', 'n_clicks'),
     State('theme-store', 'data')
 )
-def toggle_theme(n_clicks, current_theme):
-    if n_clicks is None:
-        current_theme = 'dark'
-    else:
-        current_theme = 'dark' if current_theme == 'light' else 'light'
-    
-    theme = DARK_THEME if current_theme == 'dark' else LIGHT_THEME
-    
-    # Main container style
-    container_style = {
-        'backgroundColor': theme['background'],
-        'color': theme['text'],
-        'minHeight': '100vh',
-        'padding': '20px'
-    }
-    
-    # Data table styles
-    table_data_style = {
-        'backgroundColor': theme['paper'],
-        'color': theme['text'],
-        'border': f'1px solid {theme["border"]}'
-    }
-    
-    table_header_style = {
-        'backgroundColor': theme['paper'],
-        'color': theme['text'],
-        'border': f'1px solid {theme["border"]}',
-        'fontWeight': 'bold'
-    }
-    
-    # Upload component style
-    upload_style = {
-        'width': '100%',
-        'height': '60px',
-        'lineHeight': '60px',
-        'borderWidth': '1px',
-        'borderStyle': 'dashed',
-        'borderRadius': '5px',
-        'textAlign': 'center',
-        'margin': '10px 0',
-        'backgroundColor': theme['paper'],
-        'borderColor': theme['border'],
-        'color': theme['text']
-    }
-    
-    # Theme toggle button style
-    toggle_style = {
-        'backgroundColor': theme['paper'],
-        'color': theme['text'],
-        'border': f'1px solid {theme["border"]}',
-        'padding': '10px 20px',
-        'borderRadius': '5px',
-        'cursor': 'pointer',
-        'marginLeft': '20px'
-    }
-    
-    return current_theme, container_style, table_data_style, table_header_style, upload_style, toggle_style
 
-# Callback for Data Table
+# Callback for the shared filter key
 @app.callback(
-    [Output('data-table', 'data'),
-     Output('data-table', 'columns')],
+    Output('filter-key', 'data'),
     [Input('stored-data', 'data'),
-     Input('feature-selector', 'value'),
      Input('date-range', 'start_date'),
      Input('date-range', 'end_date'),
      Input('month-year-selector', 'value')]
 )
-def update_table(stored_data, selected_features, start_date, end_date, selected_month_year):
+def compute_filter_key(stored_data, start_date, end_date, selected_month_year):
     if stored_data is None:
-        return [], []
-    
-    df = pd.read_json(stored_data, orient='split')
-    df['Transaction creation date'] = pd.to_datetime(df['Transaction creation date'])
-    
-    # Date filtering
-    if start_date and end_date:
-        df = df[
-            (df['Transaction creation date'] >= start_date) & 
-            (df['Transaction creation date'] <= end_date)
-        ]
+        return None
+    return json.dumps([stored_data, start_date, end_date, selected_month_year])
+
+# Callback for Data Table
+@app.callback(
+    [Output('data-table', 'data'),
+     Output('data-table', 'columns'),
+     Output('data-table', 'page_count'),
+     Output('data-table', 'page_current')],
+    [Input('filter-key', 'data'),
+     Input('feature-selector', 'value'),
+     Input('data-table', 'page_current'),
+     Input('data-table', 'page_size'),
+     Input('data-table', 'sort_by'),
+     Input('data-table', 'filter_query')]
+)
+def update_table(filter_key, selected_features, page_current, page_size, sort_by, filter_query):
+    if filter_key is None:
+        return [], [], 0, 0
     
-    # Month-year filtering
-    if selected_month_year:
-        month_year_date = pd.to_datetime(selected_month_year, format='%B %Y')
-        df = df[
-            (df['Transaction creation date'].dt.month == month_year_date.month) &
-            (df['Transaction creation date'].dt.year == month_year_date.year)
-        ]
+    df = get_filtered(filter_key, filter_query)
+    if df is None:
+        return [], [], 0, 0
     
     # Feature filtering
     df = df[selected_features]
     
+    # Sorting, stable so ties keep the report order
+    sort_by = [s for s in sort_by or [] if s['column_id'] in df.columns]
+    if sort_by:
+        df = df.sort_values(
+            [s['column_id'] for s in sort_by],
+            ascending=[s['direction'] == 'asc' for s in sort_by],
+            kind='stable'
+        )
+    
+    # Only the current page goes to the browser; stay on the last page when
+    # a new filter leaves fewer pages
+    page_count = math.ceil(len(df) / page_size)
+    page = min(page_current or 0, max(page_count - 1, 0))
+    start = page * page_size
+    df = df.iloc[start:start + page_size].copy()
+    
+    # Typed columns, so a bare value in a column filter means = for numbers and
+    # datestartswith for dates, as it would in a natively filtered table
+    columns = []
+    for col in df.columns:
+        column = {'name': col, 'id': col}
+        if is_datetime64_any_dtype(df[col]):
+            column['type'] = 'datetime'
+        elif is_numeric_dtype(df[col]):
+            column['type'] = 'numeric'
+        columns.append(column)
+    
     # Format date column
     if 'Transaction creation date' in df.columns:
         df['Transaction creation date'] = df['Transaction creation date'].dt.strftime('%Y-%m-%d')
@@ -362,111 +590,75 @@ def update_table(stored_data, selected_features, start_date, end_date, selected_
     if 'Net amount' in df.columns:
         df['Net amount'] = df['Net amount'].round(2)
     
-    columns = [{'name': i, 'id': i} for i in df.columns]
-    return df.to_dict('records'), columns
+    return df.to_dict('records'), columns, page_count, page if page != page_current else dash.no_update
+
+# Summary card styles by width, shared by every render
+STAT_CARD_STYLES = {
+    width: {'width': width, 'display': 'inline-block', 'textAlign': 'center'}
+    for width in ('20%', '33%', '50%')
+}
+SUMMARY_STYLE = {'marginBottom': '20px', 'marginTop': '20px'}
+
+def stat_card(title, value, note=None, width='20%'):
+    """One summary statistic: a heading, the value and an optional note"""
+    children = [html.H5(title), html.H3(value)]
+    if note is not None:
+        children.append(html.P(note))
+    return html.Div(children, style=STAT_CARD_STYLES[width])
 
 # Callback for Summary Statistics
 @app.callback(
     Output('summary-stats', 'children'),
-    [Input('stored-data', 'data'),
+    [Input('filter-key', 'data'),
      Input('feature-selector', 'value'),
-     Input('date-range', 'start_date'),
-     Input('date-range', 'end_date'),
-     Input('month-year-selector', 'value'),
-     Input('data-table', 'derived_virtual_data'),
-     Input('data-table', 'derived_virtual_indices')]
+     Input('data-table', 'filter_query')]
 )
-def update_summary_stats(stored_data, selected_features, start_date, end_date, 
-                        selected_month_year, filtered_rows, filtered_indices):
-    if stored_data is None:
+def update_summary_stats(filter_key, selected_features, filter_query):
+    if filter_key is None:
         return []
     
-    # Load initial data
-    df = pd.read_json(stored_data, orient='split')
-    df['Transaction creation date'] = pd.to_datetime(df['Transaction creation date'])
-    
-    # Apply date filtering
-    if start_date and end_date:
-        df = df[
-            (df['Transaction creation date'] >= start_date) & 
-            (df['Transaction creation date'] <= end_date)
-        ]
-    
-    # Apply month-year filtering
-    if selected_month_year:
-        month_year_date = pd.to_datetime(selected_month_year, format='%B %Y')
-        df = df[
-            (df['Transaction creation date'].dt.month == month_year_date.month) &
-            (df['Transaction creation date'].dt.year == month_year_date.year)
-        ]
+    # No section to show, so don't load the data at all
+    if SUMMARY_FEATURES.isdisjoint(selected_features or []):
+        return []
     
-    # Apply table filtering
-    if filtered_rows and filtered_indices:
-        df = pd.DataFrame(filtered_rows)
-        if 'Transaction creation date' in df.columns:
-            df['Transaction creation date'] = pd.to_datetime(df['Transaction creation date'])
-        if 'Net amount' in df.columns:
-            df['Net amount'] = pd.to_numeric(df['Net amount'], errors='coerce')
+    # Load the date/month and table filtered data
+    df = get_filtered(filter_key, filter_query)
+    if df is None:
+        return []
     
     stats = []
     
     # Financial Statistics
     if 'Net amount' in selected_features:
         if 'Type' in selected_features:
+            # Net amount totals per transaction type in one pass
+            by_type = type_totals(df)
+            
             # Order revenue
-            orders_mask = (df['Type'] == 'Order')
-            total_orders = df[orders_mask]['Net amount'].sum()
-            avg_order = df[orders_mask]['Net amount'].mean() if len(df[orders_mask]) > 0 else 0
+            total_orders = by_type.get('Order', {}).get('sum', 0)
+            avg_order = by_type.get('Order', {}).get('mean', 0)
             
             # Refunds
-            refunds_mask = (df['Type'] == 'Refund')
-            total_refunds = abs(df[refunds_mask]['Net amount'].sum())
+            total_refunds = abs(by_type.get('Refund', {}).get('sum', 0))
             
             # Shipping labels
-            shipping_mask = (df['Type'] == 'Shipping label')
-            total_shipping = abs(df[shipping_mask]['Net amount'].sum())
+            total_shipping = abs(by_type.get('Shipping label', {}).get('sum', 0))
             
             # Other fees
-            fees_mask = (df['Type'] == 'Other fee')
-            total_fees = abs(df[fees_mask]['Net amount'].sum())
+            total_fees = abs(by_type.get('Other fee', {}).get('sum', 0))
             
             # Payouts
-            payouts_mask = (df['Type'] == 'Payout')
-            total_payouts = df[payouts_mask]['Net amount'].sum()
+            total_payouts = by_type.get('Payout', {}).get('sum', 0)
             
             # Calculate net revenue (Orders - Refunds - Shipping - Fees)
             net_revenue = total_orders - total_refunds - total_shipping - total_fees
             
             stats.extend([
-                html.Div([
-                    html.H5('Order Revenue'),
-                    html.H3(f'${total_orders:,.2f}'),
-                    html.P(f'Average: ${avg_order:,.2f}')
-                ], style={'width': '20%', 'display': 'inline-block', 'textAlign': 'center'}),
-                
-                html.Div([
-                    html.H5('Net Revenue'),
-                    html.H3(f'${net_revenue:,.2f}'),
-                    html.P(f'After fees & refunds')
-                ], style={'width': '20%', 'display': 'inline-block', 'textAlign': 'center'}),
-                
-                html.Div([
-                    html.H5('Expenses'),
-                    html.H3(f'${(total_shipping + total_fees):,.2f}'),
-                    html.P(f'Shipping: ${total_shipping:,.2f}')
-                ], style={'width': '20%', 'display': 'inline-block', 'textAlign': 'center'}),
-                
-                html.Div([
-                    html.H5('Refunds'),
-                    html.H3(f'${total_refunds:,.2f}'),
-                    html.P(f'From total orders')
-                ], style={'width': '20%', 'display': 'inline-block', 'textAlign': 'center'}),
-                
-                html.Div([
-                    html.H5('Payouts'),
-                    html.H3(f'${total_payouts:,.2f}'),
-                    html.P(f'Total transferred')
-                ], style={'width': '20%', 'display': 'inline-block', 'textAlign': 'center'})
+                stat_card('Order Revenue', f'${total_orders:,.2f}', f'Average: ${avg_order:,.2f}', width='20%'),
+                stat_card('Net Revenue', f'${net_revenue:,.2f}', 'After fees & refunds', width='20%'),
+                stat_card('Expenses', f'${(total_shipping + total_fees):,.2f}', f'Shipping: ${total_shipping:,.2f}', width='20%'),
+                stat_card('Refunds', f'${total_refunds:,.2f}', 'From total orders', width='20%'),
+                stat_card('Payouts', f'${total_payouts:,.2f}', 'Total transferred', width='20%')
             ])
         else:
             # If Type is not selected, use simple positive/negative calculation
@@ -475,54 +667,37 @@ def update_summary_stats(stored_data, selected_features, start_date, end_date,
             net_total = total_positive - total_negative
             
             stats.extend([
-                html.Div([
-                    html.H5('Total Income'),
-                    html.H3(f'${total_positive:,.2f}'),
-                ], style={'width': '33%', 'display': 'inline-block', 'textAlign': 'center'}),
-                
-                html.Div([
-                    html.H5('Total Expenses'),
-                    html.H3(f'${total_negative:,.2f}'),
-                ], style={'width': '33%', 'display': 'inline-block', 'textAlign': 'center'}),
-                
-                html.Div([
-                    html.H5('Net Total'),
-                    html.H3(f'${net_total:,.2f}'),
-                ], style={'width': '33%', 'display': 'inline-block', 'textAlign': 'center'})
+                stat_card('Total Income', f'${total_positive:,.2f}', width='33%'),
+                stat_card('Total Expenses', f'${total_negative:,.2f}', width='33%'),
+                stat_card('Net Total', f'${net_total:,.2f}', width='33%')
             ])
     
     # Transaction Statistics
     if 'Type' in selected_features:
-        type_counts = df['Type'].value_counts()
+        # Count the plain values so empty categories are skipped and ties
+        # list in the same order as before Type was a category
+        type_counts = df['Type'].astype(object).value_counts()
         total_transactions = len(df)
         
         stats.extend([
-            html.Div([
-                html.H5('Transaction Breakdown'),
-                html.H3(f'{total_transactions:,} Total'),
-                html.P(', '.join([f'{k}: {v:,}' for k, v in type_counts.items()]))
-            ], style={'width': '50%', 'display': 'inline-block', 'textAlign': 'center'})
+            stat_card(
+                'Transaction Breakdown', f'{total_transactions:,} Total',
+                ', '.join([f'{k}: {v:,}' for k, v in type_counts.items()]), width='50%'
+            )
         ])
     
     # Buyer Statistics
     if 'Buyer username' in selected_features:
-        unique_buyers = df['Buyer username'].nunique()
-        repeat_buyers = df.groupby('Buyer username').size()
-        repeat_buyer_count = len(repeat_buyers[repeat_buyers > 1])
+        # Rows per buyer straight from the category codes
+        buyer_codes = df['Buyer username'].cat.codes.to_numpy()
+        buyer_counts = np.bincount(buyer_codes[buyer_codes >= 0])
+        unique_buyers = int((buyer_counts > 0).sum())
+        repeat_buyer_count = int((buyer_counts > 1).sum())
         repeat_rate = (repeat_buyer_count / unique_buyers * 100) if unique_buyers > 0 else 0
         
         stats.extend([
-            html.Div([
-                html.H5('Unique Buyers'),
-                html.H3(f'{unique_buyers:,}'),
-                html.P(f'Total distinct customers')
-            ], style={'width': '33%', 'display': 'inline-block', 'textAlign': 'center'}),
-            
-            html.Div([
-                html.H5('Repeat Buyers'),
-                html.H3(f'{repeat_buyer_count:,}'),
-                html.P(f'{repeat_rate:.1f}% of total buyers')
-            ], style={'width': '33%', 'display': 'inline-block', 'textAlign': 'center'})
+            stat_card('Unique Buyers', f'{unique_buyers:,}', 'Total distinct customers', width='33%'),
+            stat_card('Repeat Buyers', f'{repeat_buyer_count:,}', f'{repeat_rate:.1f}% of total buyers', width='33%')
         ])
     
     # Time Period Statistics
@@ -531,58 +706,38 @@ def update_summary_stats(stored_data, selected_features, start_date, end_date,
         daily_avg_transactions = len(df) / (date_range + 1) if date_range >= 0 else len(df)
         
         stats.extend([
-            html.Div([
-                html.H5('Time Period'),
-                html.H3(f'{date_range + 1} days'),
-                html.P(f'{daily_avg_transactions:.1f} transactions/day')
-            ], style={'width': '33%', 'display': 'inline-block', 'textAlign': 'center'})
+            stat_card('Time Period', f'{date_range + 1} days', f'{daily_avg_transactions:.1f} transactions/day', width='33%')
         ])
     
-    return html.Div(stats, style={'marginBottom': '20px', 'marginTop': '20px'})
+    return html.Div(stats, style=SUMMARY_STYLE)
 # Callback for Sales Trend
 @app.callback(
     Output('sales-trend', 'figure'),
-    [Input('stored-data', 'data'),
+    [Input('filter-key', 'data'),
      Input('feature-selector', 'value'),
-     Input('date-range', 'start_date'),
-     Input('date-range', 'end_date'),
-     Input('month-year-selector', 'value'),
-     Input('data-table', 'derived_virtual_data'),
-     Input('data-table', 'derived_virtual_indices'),
+     Input('data-table', 'filter_query'),
      Input('theme-store', 'data')]
 )
-def update_sales_trend(stored_data, selected_features, start_date, end_date, 
-                      selected_month_year, filtered_rows, filtered_indices, theme):
-    if stored_data is None or 'Transaction creation date' not in selected_features or 'Net amount' not in selected_features:
+def update_sales_trend(filter_key, selected_features, filter_query, theme):
+    if filter_key is None or 'Transaction creation date' not in selected_features or 'Net amount' not in selected_features:
         return go.Figure()
     
-    # Load and process data
-    df = pd.read_json(stored_data, orient='split')
-    df['Transaction creation date'] = pd.to_datetime(df['Transaction creation date'])
-    
-    # Apply date filtering
-    if start_date and end_date:
-        df = df[
-            (df['Transaction creation date'] >= start_date) & 
-            (df['Transaction creation date'] <= end_date)
-        ]
-    
-    # Apply month-year filtering
-    if selected_month_year:
-        month_year_date = pd.to_datetime(selected_month_year, format='%B %Y')
-        df = df[
-            (df['Transaction creation date'].dt.month == month_year_date.month) &
-            (df['Transaction creation date'].dt.year == month_year_date.year)
-        ]
+    stored_data, start_date, end_date, selected_month_year = json.loads(filter_key)
     
     # Apply table filtering
-    if filtered_rows and filtered_indices:
-        df = pd.DataFrame(filtered_rows)
-        df['Transaction creation date'] = pd.to_datetime(df['Transaction creation date'])
-        df['Net amount'] = pd.to_numeric(df['Net amount'], errors='coerce')
-    
-    # Group by date and calculate daily sales
-    daily_sales = df.groupby('Transaction creation date')['Net amount'].sum().reset_index()
+    if filter_query:
+        df = get_filtered(filter_key, filter_query)
+        if df is None:
+            return go.Figure()
+        
+        # Group by date and calculate daily sales
+        daily_sales = df.groupby('Transaction creation date')['Net amount'].sum().reset_index()
+    else:
+        # Slice the daily totals computed at upload
+        daily_sales = cache.get(f'{stored_data}:daily')
+        if daily_sales is None:
+            return go.Figure()
+        daily_sales = filter_dates(daily_sales, start_date, end_date, selected_month_year)
     
     # Calculate moving average for trend line
     daily_sales['MA7'] = daily_sales['Net amount'].rolling(window=7, min_periods=1).mean()
@@ -593,18 +748,44 @@ def update_sales_trend(stored_data, selected_features, start_date, end_date,
     # Create the figure
     fig = go.Figure()
     
-    # Add the bar chart
-    fig.add_trace(go.Bar(
-        x=daily_sales['Transaction creation date'],
-        y=daily_sales['Net amount'],
-        name='Daily Sales',
-        marker_color=theme_colors['accent']
-    ))
+    # SVG bars and lines get slow with many days, WebGL does not
+    use_webgl = len(daily_sales) > WEBGL_THRESHOLD
+    
+    # Send at most MAX_TREND_POINTS per trace; the average is taken first so
+    # it still covers every day
+    sales, trend = daily_sales, daily_sales
+    if len(daily_sales) > MAX_TREND_POINTS:
+        x = daily_sales['Transaction creation date'].to_numpy(np.int64).astype(np.float64)
+        sales = daily_sales.iloc[lttb_indices(
+            x, daily_sales['Net amount'].to_numpy(np.float64), MAX_TREND_POINTS
+        )]
+        trend = daily_sales.iloc[lttb_indices(
+            x, daily_sales['MA7'].to_numpy(np.float64), MAX_TREND_POINTS
+        )]
+    
+    # Add the bar chart, a filled WebGL line on long ranges
+    if use_webgl:
+        fig.add_trace(go.Scattergl(
+            x=sales['Transaction creation date'],
+            y=sales['Net amount'],
+            mode='lines',
+            fill='tozeroy',
+            name='Daily Sales',
+            line=dict(color=theme_colors['accent'])
+        ))
+    else:
+        fig.add_trace(go.Bar(
+            x=sales['Transaction creation date'],
+            y=sales['Net amount'],
+            name='Daily Sales',
+            marker_color=theme_colors['accent']
+        ))
     
     # Add the moving average trend line
-    fig.add_trace(go.Scatter(
-        x=daily_sales['Transaction creation date'],
-        y=daily_sales['MA7'],
+    scatter = go.Scattergl if use_webgl else go.Scatter
+    fig.add_trace(scatter(
+        x=trend['Transaction creation date'],
+        y=trend['MA7'],
         mode='lines',
         name='7-Day Average',
         line=dict(
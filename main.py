@@ -18,10 +18,16 @@ from bs4 import BeautifulSoup
 
 '''
 
+# Per-transaction divs read by collection()
+TRANSACTION_CLASSES = [
+    'transactions-date', 'transaction--desc', 'transaction--amount',
+    'transaction--fees', 'transaction--net', 'transaction--running-total'
+]
+
 
 def collection(html):
     with open(html) as fp:
-        soup = BeautifulSoup(fp, 'html.parser')
+        soup = BeautifulSoup(fp, 'lxml')
 
     header = soup.find_all("header", {"class": "transactions-header-v2"})
     for name in header:
@@ -31,47 +37,47 @@ def collection(html):
     for t in header_spans:
         columns.append(t.text.split()[0])
 
-    df = pd.DataFrame(columns=columns)
-
     transactions_list = soup.find_all("div", {"class": "transaction--content-wrapper"})
 
+    # Collect one dict per transaction and build the frame once at the end
+    records = list()
     for item in transactions_list:
-        i = len(df)
-        dates = item.find_all('div', {'class': 'transactions-date'})
-        df.loc[i, 'Date'] = dates[0].find('span').text
+        # One scan per transaction, keeping the first div of each class
+        parts = dict()
+        for el in item.find_all('div', class_=TRANSACTION_CLASSES):
+            for cls in el['class']:
+                if cls in TRANSACTION_CLASSES:
+                    parts.setdefault(cls, el)
+
+        rec = dict()
+        rec['Date'] = parts['transactions-date'].find('span').text
 
-        orders = item.find_all('div', {'class': 'transaction--desc'})
-        
-        descs = item.find_all('div', {'class': 'transaction--desc'})
-        desc = descs[0].find('span', {'class': 'BOLD'}).text
-        df.loc[i, 'Description'] = desc
+        desc = parts['transaction--desc'].find('span', {'class': 'BOLD'}).text
+        rec['Description'] = desc
 
         # if desc == 'Order':
-        #     names = item.find_all('div', {'class': 'transaction--desc'})
-        #     df.loc[i, 'Name'] = descs[0].find('span', {'class': 'BOLD'}).text
+        #     rec['Name'] = parts['transaction--desc'].find('span', {'class': 'BOLD'}).text
         # else:
-        #     df.loc[i, 'Name'] = np.NaN
+        #     rec['Name'] = np.NaN
 
-        amounts = item.find_all('div', {'class': 'transaction--amount'})
         try:
-            df.loc[i, 'Amount'] = amounts[0].find('span', {'class': 'each-as-row'}).text
+            rec['Amount'] = parts['transaction--amount'].find('span', {'class': 'each-as-row'}).text
         except AttributeError:
-            df.loc[i, 'Fees'] = np.NaN
+            rec['Amount'] = np.NaN
 
-        fees = item.find_all('div', {'class': 'transaction--fees'})
         try:
-            df.loc[i, 'Fees'] = fees[0].find('span', {'class': 'each-as-row'}).text
+            rec['Fees'] = parts['transaction--fees'].find('span', {'class': 'each-as-row'}).text
         except AttributeError:
-            df.loc[i, 'Fees'] = np.NaN
+            rec['Fees'] = np.NaN
 
-        nets = item.find_all('div', {'class': 'transaction--net'})
-        df.loc[i, 'Net'] = nets[0].find('span', {'class': 'each-as-row'}).text
+        rec['Net'] = parts['transaction--net'].find('span', {'class': 'each-as-row'}).text
 
-        totals = item.find_all('div', {'class': 'transaction--running-total'})
-        df.loc[i, 'Total'] = totals[0].find('span', {'class': 'SECONDARY'}).text
+        rec['Total'] = parts['transaction--running-total'].find('span', {'class': 'SECONDARY'}).text
 
         # details = item.find_all('div', {'class': 'transaction--details'})
-    return df
+        records.append(rec)
+
+    return pd.DataFrame.from_records(records, columns=columns)
 
 
 if __name__ == "__main__":
@@ -79,16 +85,9 @@ if __name__ == "__main__":
     pages = os.listdir(rootdir + '/pages')
     l = len(pages)
 
-    def make_df(df, l):
-            while l > 0:
-                print(l)
-                html = f'pages/page_{l}.html'
-                new_df = collection(html)
-                l -= 1
-                return pd.concat([df, make_df(new_df, l)], ignore_index=True)
-
-
-    df = make_df(pd.DataFrame(), l)
+    # Parse every page, then concatenate once
+    frames = [collection(f'pages/page_{i}.html') for i in range(1, l + 1)]
+    df = pd.concat(frames, ignore_index=True, copy=False)
     df.to_csv(f'data/eBay_transactions_{time.time()}.csv')
 
     html = 'pages/page_1.html'
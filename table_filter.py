@@ -0,0 +1,119 @@
+"""Server-side evaluation of Dash DataTable filter_query strings, shared by the
+dashboards so their summaries and trends see the rows the table shows"""
+import re
+
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+
+# Relational operators by spelling, mapped to the comparison they run
+RELATIONAL_OPERATORS = {
+    '>=': 'ge', '<=': 'le', '!=': 'ne', '<': 'lt', '>': 'gt', '=': 'eq',
+    'ge': 'ge', 'le': 'le', 'ne': 'ne', 'lt': 'lt', 'gt': 'gt', 'eq': 'eq',
+    'contains': 'contains', 'datestartswith': 'datestartswith'
+}
+
+# 'is ...' checks a column filter can hold
+UNARY_OPERATORS = frozenset(['blank', 'nil', 'num', 'str', 'even', 'odd'])
+
+# One clause as the table writes it: {column}, then an 'is ...' check or an
+# operator and a value. Operators other than datestartswith carry an optional
+# case prefix, s (sensitive, the table's default) or i (insensitive); values
+# are bare or quoted with ', " or `, backslash-escaped either way
+CLAUSE_RE = re.compile(r'''
+    \s*\{(?P<column>(?:[^{}\\]|\\.)+)\}\s*
+    (?:
+        is\s+(?P<unary>[a-z]+)
+      | (?:
+            (?P<case>[is])?(?P<operator>>=|<=|!=|<|>|=|(?:contains|eq|ne|lt|le|gt|ge)(?=\s))
+          | (?P<datestartswith>datestartswith)(?=\s)
+        )
+        \s*(?P<value>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`(?:[^`\\]|\\.)*`|(?:[^\s'"`{}()\\]|\\.)+)
+    )
+    \s*(?:&&|$)
+''', re.IGNORECASE | re.VERBOSE)
+
+ESCAPE_RE = re.compile(r'\\(.)')
+
+def _unescape(text):
+    return ESCAPE_RE.sub(r'\1', text)
+
+def parse_filter_query(filter_query):
+    """Split a filter_query into (column, operator, insensitive, value) clauses,
+    raising ValueError on anything a column filter would not produce"""
+    clauses = []
+    pos = 0
+    while pos < len(filter_query):
+        match = CLAUSE_RE.match(filter_query, pos)
+        if match is None:
+            raise ValueError(f'Cannot evaluate filter_query from {filter_query[pos:]!r}')
+        column = _unescape(match['column'])
+        if match['unary']:
+            unary = match['unary'].lower()
+            if unary not in UNARY_OPERATORS:
+                raise ValueError(f"Cannot evaluate filter 'is {unary}' on {column!r}")
+            clauses.append((column, unary, False, None))
+        else:
+            value = match['value']
+            if value[0] in '\'"`':
+                value = value[1:-1]
+            operator = (match['operator'] or match['datestartswith']).lower()
+            insensitive = (match['case'] or '').lower() == 'i'
+            clauses.append((column, RELATIONAL_OPERATORS[operator], insensitive, _unescape(value)))
+        pos = match.end()
+    return clauses
+
+def _is_number(series):
+    return is_numeric_dtype(series) and not is_bool_dtype(series)
+
+def _cell_text(series):
+    """Column values as the table holds them: dates as YYYY-MM-DD, whole
+    numbers without a trailing '.0'"""
+    if is_datetime64_any_dtype(series):
+        return series.dt.strftime('%Y-%m-%d')
+    text = series.astype(str)
+    if _is_number(series):
+        text = text.str.replace(r'\.0$', '', regex=True)
+    return text
+
+def clause_mask(series, operator, insensitive, value):
+    """Boolean mask of the rows of one column that pass one clause"""
+    present = series.notna()
+    none = pd.Series(False, index=series.index)
+    if operator == 'nil':
+        return ~present
+    if operator == 'blank':
+        return ~present | (_cell_text(series) == '')
+    if operator == 'num':
+        return present if _is_number(series) else none
+    if operator == 'str':
+        return none if _is_number(series) else present
+    if operator in ('even', 'odd'):
+        return present & (series % 2 == int(operator == 'odd')) if _is_number(series) else none
+
+    # Numbers compare as numbers; the table never matches one against text but with !=
+    if operator not in ('contains', 'datestartswith') and _is_number(series):
+        try:
+            number = float(value)
+        except ValueError:
+            return present if operator == 'ne' else none
+        return present & getattr(series, operator)(number)
+
+    # Everything else, contains included, compares the text the table shows
+    text = _cell_text(series)
+    if insensitive:
+        text, value = text.str.upper(), value.upper()
+    if operator == 'contains':
+        mask = text.str.contains(value, regex=False)
+    elif operator == 'datestartswith':
+        mask = text.str.startswith(value)
+    else:
+        mask = getattr(text, operator)(value)
+    return present & mask
+
+def apply_filter_query(df, filter_query):
+    """Apply a data table filter_query to a frame, matching what the table shows"""
+    for column, operator, insensitive, value in parse_filter_query(filter_query):
+        if column not in df.columns:
+            raise ValueError(f'Cannot filter on unknown column {column!r}')
+        df = df[clause_mask(df[column], operator, insensitive, value)]
+    return df
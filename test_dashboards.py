@@ -0,0 +1,83 @@
+import base64
+import json
+
+import pytest
+
+import gen_dash_app_1
+import hoold
+
+ORDERS_CSV = '''Order creation date,Order number,Item ID,Item title,Buyer name,Ship to city,Ship to province/region/state,Ship to zip,Ship to country,Transaction currency,Payout currency,eBay collected tax,Item price,Quantity,Item subtotal,Shipping and handling,Seller collected tax,Discount,Gross amount,Final Value Fee - fixed,Final Value Fee - variable,Below standard performance fee,"Very high ""item not as described"" fee",International fee,Deposit processing fee,Regulatory operating fee,Promoted Listing Standard fee,Charity donation,Shipping labels,Payment Dispute Fee,Expenses,Refunds,Order earnings
+"Aug 01, 2024",10-11890-47207-0,266885960687,Bronco Top,Kristina Leven,New Albany,OH,43054,US,USD,USD,$0,$29.61,1,29.61,$4.47,$0,$0,34.08,$0.30,3.90,$0,0,0,0,$0.40,0,$0,$4.47,0,$0,0,$25.01
+"Aug 02, 2024",11-11426-82837-0,266885960688,Linen Skirt,Ann Lee,Dayton,OH,45402,US,USD,USD,$0,$12.00,2,24.00,$3.00,$0,$0,27.00,$0.30,2.40,$0,0,0,0,$0.20,0,$0,$3.00,0,$0,0,$21.10
+"Aug 03, 2024",12-11426-82837-0,266885960689,Denim Jacket,Bob Ray,Akron,OH,44301,US,USD,USD,$0,$5.00,1,5.00,$2.00,$0,$0,7.00,$0.30,0.70,$0,0,0,0,$0.10,0,$0,$2.00,0,$0,0,$3.90
+'''
+
+TRANSACTIONS_CSV = '''Transaction creation date,Type,Order number,Buyer username,Net amount,Item title
+"Aug 1, 2024",Order,10-11890-47207-0,kristina,25.17,Bronco Top
+"Aug 1, 2024",Shipping label,10-11890-47207-0,kristina,-4.47,--
+"Aug 2, 2024",Order,11-11426-82837-0,ann,20.10,Linen Skirt
+'''
+
+# Filters a column filter can hold but the server cannot evaluate
+BAD_FILTERS = ['{Net amount} is prime', '{Not a column} scontains x']
+
+def run_callback(app, output, values):
+    """Fire one callback through the endpoint the browser posts to, with its
+    inputs and state taken from values by 'id.property'; returns the outputs"""
+    callback = app.callback_map[output]
+    def props(deps):
+        return [dict(dep, value=values.get(f"{dep['id']}.{dep['property']}")) for dep in deps]
+    outputs = [dict(zip(('id', 'property'), o.split('.', 1))) for o in output.strip('.').split('...')]
+    payload = {
+        'output': output,
+        'outputs': outputs if output.startswith('..') else outputs[0],
+        'inputs': props(callback['inputs']),
+        'state': props(callback['state']),
+        'changedPropIds': [f"{callback['inputs'][0]['id']}.{callback['inputs'][0]['property']}"]
+    }
+    response = app.server.test_client().post('/_dash-update-component', json=payload)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    result = response.get_json()['response']
+    values.update({f"{o['id']}.{o['property']}": result[o['id']][o['property']]
+                   for o in outputs if o['property'] in result.get(o['id'], {})})
+    return values
+
+def upload(app, filename, text, features):
+    contents = 'data:text/csv;base64,' + base64.b64encode(text.encode()).decode()
+    values = {'upload-data.contents': contents, 'upload-data.filename': filename,
+              'feature-selector.value': features, 'data-table.filter_query': ''}
+    outputs = next(o for o in app.callback_map if 'stored-data.data' in o)
+    run_callback(app, outputs, values)
+    return run_callback(app, 'filter-key.data', values)
+
+def filtered_outputs(app, outputs, values, filter_query):
+    values = dict(values, **{'data-table.filter_query': filter_query})
+    for output in outputs:
+        run_callback(app, output, values)
+    return values
+
+@pytest.mark.parametrize('filter_query', BAD_FILTERS)
+def test_hoold_skips_unevaluable_table_filter(filter_query):
+    values = upload(hoold.app, 'tx.csv', TRANSACTIONS_CSV,
+                    ['Transaction creation date', 'Type', 'Buyer username', 'Net amount'])
+    values.update({'data-table.page_current': 0, 'data-table.page_size': 10, 'data-table.sort_by': []})
+    outputs = [next(o for o in hoold.app.callback_map if 'data-table.data' in o), 'summary-stats.children']
+    unfiltered = filtered_outputs(hoold.app, outputs, values, '')
+    assert filtered_outputs(hoold.app, outputs, values, filter_query) == dict(
+        unfiltered, **{'data-table.filter_query': filter_query}
+    )
+    assert len(filtered_outputs(hoold.app, outputs, values, '{Type} scontains Order')['data-table.data']) == 2
+
+@pytest.mark.parametrize('filter_query', BAD_FILTERS)
+def test_gen_skips_unevaluable_table_filter(filter_query):
+    values = upload(gen_dash_app_1.app, 'orders.csv', ORDERS_CSV,
+                    ['Order creation date', 'Gross amount', 'Order earnings'])
+    # Narrowed in the browser by a clientside callback
+    values['stat-features.data'] = ['Order creation date', 'Gross amount', 'Order earnings']
+    outputs = ['summary-stats.children', 'sales-trend-figure.data']
+    unfiltered = filtered_outputs(gen_dash_app_1.app, outputs, values, '')
+    assert filtered_outputs(gen_dash_app_1.app, outputs, values, filter_query) == dict(
+        unfiltered, **{'data-table.filter_query': filter_query}
+    )
+    filtered = filtered_outputs(gen_dash_app_1.app, outputs, values, '{Gross amount} s> 20')
+    assert json.dumps(filtered['summary-stats.children']) != json.dumps(unfiltered['summary-stats.children'])
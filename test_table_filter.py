@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from table_filter import apply_filter_query, parse_filter_query
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        'Type': ['Order', 'Refund', 'order fee', None],
+        'Buyer username': ['jo blogs', 'ann', 'jo', 'bob'],
+        'Net amount': [12.0, -3.5, 112.25, 7.0],
+        'Transaction creation date': pd.to_datetime(['2024-02-01', '2024-02-15', '2024-03-01', '2024-03-02'])
+    })
+
+# Queries as a DataTable with the default filter_options writes them
+@pytest.mark.parametrize('query, rows', [
+    ('{Type} scontains Order', [0]),
+    ('{Type} icontains order', [0, 2]),
+    ('{Type} s= Refund', [1]),
+    ('{Type} i= REFUND', [1]),
+    ('{Buyer username} scontains "jo b"', [0]),
+    ('{Net amount} s> 5', [0, 2, 3]),
+    ('{Net amount} s= 12', [0]),
+    ('{Net amount} s<= -3.5', [1]),
+    ('{Net amount} s!= 7', [0, 1, 2]),
+    ('{Net amount} scontains 12', [0, 2]),
+    ('{Net amount} s= abc', []),
+    ('{Transaction creation date} datestartswith 2024-02', [0, 1]),
+    ('{Transaction creation date} s>= 2024-03-01', [2, 3]),
+    ('{Type} is blank', [3]),
+    ('{Net amount} is num', [0, 1, 2, 3]),
+    ('{Type} scontains r && {Net amount} s> 0', [0, 2]),
+])
+def test_table_generated_queries(df, query, rows):
+    assert apply_filter_query(df, query).index.tolist() == rows
+
+def test_word_operators_and_escapes():
+    assert parse_filter_query(r'{Net amount} ge 5 && {Type} contains "a \"b\""') == [
+        ('Net amount', 'ge', False, '5'),
+        ('Type', 'contains', False, 'a "b"')
+    ]
+
+def test_contains_keeps_value_as_text():
+    assert parse_filter_query('{Order number} scontains 12') == [('Order number', 'contains', False, '12')]
+
+@pytest.mark.parametrize('query', [
+    '{Net amount} is prime',
+    '{Type} scontains a || {Type} scontains b',
+    '{Missing} scontains a',
+    'Type scontains a',
+])
+def test_unsupported_clauses_raise(df, query):
+    with pytest.raises(ValueError):
+        apply_filter_query(df, query)
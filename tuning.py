@@ -1,10 +1,14 @@
 import os 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import re
 import time
 
-from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
+from html import unescape
+from selectolax.lexbor import LexborHTMLParser
 
 '''
 'transactions-date'
@@ -18,89 +22,214 @@ from bs4 import BeautifulSoup
 
 '''
 
+# Format of the transaction dates on the page, e.g. 'Apr 2, 2024'
+DATE_FORMAT = '%b %d, %Y'
 
-def collection(html):
-    with open(html) as fp:
-        soup = BeautifulSoup(fp, 'html.parser')
+# Write buffer for make_csv, so page rows reach disk in large blocks
+CSV_BUFFER_BYTES = 1 << 20
+
+# Per-transaction divs read by collection()
+TRANSACTION_CLASSES = [
+    'transactions-date', 'transaction--desc', 'transaction--amount',
+    'transaction--fees', 'transaction--net', 'transaction--running-total'
+]
+
+# Characters dropped from money text before float()
+MONEY_STRIP = str.maketrans('', '', '$,')
+
+# Frame columns: the transactions-header-v2 header, which is the same on every
+# page, followed by Name
+COLUMNS = ['Date', 'Description', 'Amount', 'Fees', 'Net', 'Total', 'Details', 'Name']
+
+# Arrow schema of the exported CSV: the unnamed row index, then COLUMNS
+CSV_SCHEMA = pa.schema([
+    ('', pa.int64()),
+    ('Date', pa.string()),
+    ('Description', pa.string()),
+    ('Amount', pa.float64()),
+    ('Fees', pa.float64()),
+    ('Net', pa.float64()),
+    ('Total', pa.float64()),
+    ('Details', pa.string()),
+    ('Name', pa.string()),
+])
+
+# CSS selectors for the Lexbor tree
+TRANSACTION_SELECTOR = 'div.transaction--content-wrapper'
+
+
+def span_text_re(cls):
+    # Text of a leaf <span> whose class list includes cls
+    return re.compile(rb'<span class="(?:[^"]* )?' + cls + rb'(?: [^"]*)?"[^>]*>([^<]*)</span>')
+
+
+# Raw-byte patterns for scan_page(). Every transaction part starts with a div
+# carrying exactly one of these classes, so the page splits into segments at
+# those tags
+MARKER_CLASSES = ['transaction--content-wrapper', 'transaction--image', 'transaction--details'] + TRANSACTION_CLASSES
+MARKER_RE = re.compile(rb'<div class="(' + b'|'.join(re.escape(cls.encode()) for cls in MARKER_CLASSES) + rb')">')
+ROW_SPAN_RE = span_text_re(rb'each-as-row')
+BOLD_SPAN_RE = span_text_re(rb'BOLD')
+TOTAL_SPAN_RE = span_text_re(rb'SECONDARY')
+NAME_SPAN_RE = re.compile(rb'<span class="">([^<]*)</span>')
+
+
+def parse_money(text):
+    # '-$1,234.56' -> -1234.56
+    return float(text.translate(MONEY_STRIP))
+
+
+def span_text(match):
+    return unescape(match.group(1).decode())
+
+
+def scan_page(data):
+    """Pull the transaction columns straight out of the page bytes, or return
+    None when the markup is not what the patterns expect"""
+    marks = list(MARKER_RE.finditer(data))
 
-    header = soup.find_all("header", {"class": "transactions-header-v2"})
-    for name in header:
-        header_spans = (name.find_all("span", {"class": "each-as-row"}))
+    # Split the page into per-transaction dicts of class -> segment bytes
+    rows = list()
+    for mark, end in zip(marks, [m.start() for m in marks[1:]] + [len(data)]):
+        cls = mark.group(1).decode()
+        if cls == 'transaction--content-wrapper':
+            rows.append(dict())
+        elif rows:
+            rows[-1].setdefault(cls, data[mark.end():end])
 
-    columns = list()
-    for t in header_spans:
-        columns.append(t.text.split()[0])
+    if not rows:
+        return None
 
-    df = pd.DataFrame(columns=columns)
+    dates, descs, names, amounts, fees, nets, totals = [], [], [], [], [], [], []
+    try:
+        for parts in rows:
+            dates.append(span_text(ROW_SPAN_RE.search(parts['transactions-date'])))
 
-    transactions_list = soup.find_all("div", {"class": "transaction--content-wrapper"})
+            desc = span_text(BOLD_SPAN_RE.search(parts['transaction--desc']))
+            descs.append(desc)
 
-    for item in transactions_list:
-        i = len(df)
-        dates = item.find_all('div', {'class': 'transactions-date'})
-        df.loc[i, 'Date'] = dates[0].find('span').text
+            if desc == 'Order':
+                spans = list(NAME_SPAN_RE.finditer(parts['transaction--desc']))
+                names.append(span_text(spans[1]))
+            else:
+                names.append(np.NaN)
 
-        orders = item.find_all('div', {'class': 'transaction--desc'})
-        
-        descs = item.find_all('div', {'class': 'transaction--desc'})
-        desc = descs[0].find('span', {'class': 'BOLD'}).text
-        df.loc[i, 'Description'] = desc
+            # Amount and Fees are blank on some rows
+            amount = ROW_SPAN_RE.search(parts['transaction--amount'])
+            amounts.append(parse_money(span_text(amount)) if amount is not None else np.NaN)
+
+            fee = ROW_SPAN_RE.search(parts['transaction--fees'])
+            fees.append(parse_money(span_text(fee)) if fee is not None else np.NaN)
+
+            nets.append(parse_money(span_text(ROW_SPAN_RE.search(parts['transaction--net']))))
+
+            totals.append(parse_money(span_text(TOTAL_SPAN_RE.search(parts['transaction--running-total']))))
+    except (AttributeError, IndexError, KeyError, UnicodeDecodeError, ValueError):
+        return None
+
+    return dates, descs, names, amounts, fees, nets, totals
+
+
+def parse_page(data):
+    """Read the transaction columns from the full Lexbor tree"""
+    # Let Lexbor detect the page encoding from the raw bytes
+    tree = LexborHTMLParser(data, encoding=True)
+
+    # One list per column, appended to in step for each transaction
+    dates, descs, names, amounts, fees, nets, totals = [], [], [], [], [], [], []
+    for item in tree.css(TRANSACTION_SELECTOR):
+        # The field divs are direct children carrying exactly one class, so
+        # match the class string itself instead of running a CSS query
+        parts = dict()
+        for div in item.iter():
+            cls = div.attributes.get('class')
+            if cls in TRANSACTION_CLASSES:
+                parts.setdefault(cls, div)
+
+        dates.append(parts['transactions-date'].css_first('span').text())
+
+        desc = parts['transaction--desc'].css_first('span.BOLD').text()
+        descs.append(desc)
 
         if desc == 'Order':
-            names = item.find_all('div', {'class': 'transaction--desc'})
-            names= names[0].find_all('span', {'class': ''})
-            print(names[1].text)
-            df.loc[i, 'Name'] = names[1].text
+            spans = parts['transaction--desc'].css('span[class=""]')
+            names.append(spans[1].text())
         else:
-            df.loc[i, 'Name'] = np.NaN
+            names.append(np.NaN)
+
+        # Amount and Fees are blank on some rows
+        amount = parts['transaction--amount'].css_first('span.each-as-row')
+        amounts.append(parse_money(amount.text()) if amount is not None else np.NaN)
+
+        fee = parts['transaction--fees'].css_first('span.each-as-row')
+        fees.append(parse_money(fee.text()) if fee is not None else np.NaN)
+
+        nets.append(parse_money(parts['transaction--net'].css_first('span.each-as-row').text()))
 
-        amounts = item.find_all('div', {'class': 'transaction--amount'})
-        try:
-            df.loc[i, 'Amount'] = amounts[0].find('span', {'class': 'each-as-row'}).text
-        except AttributeError:
-            df.loc[i, 'Fees'] = np.NaN
+        totals.append(parse_money(parts['transaction--running-total'].css_first('span.SECONDARY').text()))
 
-        fees = item.find_all('div', {'class': 'transaction--fees'})
-        try:
-            df.loc[i, 'Fees'] = fees[0].find('span', {'class': 'each-as-row'}).text
-        except AttributeError:
-            df.loc[i, 'Fees'] = np.NaN
+        # details = item.css('div.transaction--details')
+
+    return dates, descs, names, amounts, fees, nets, totals
+
+
+def collection(html):
+    with open(html, 'rb') as fp:
+        page = fp.read()
 
-        nets = item.find_all('div', {'class': 'transaction--net'})
-        df.loc[i, 'Net'] = nets[0].find('span', {'class': 'each-as-row'}).text
+    # The regex scan handles eBay's generated markup; pages it cannot read go
+    # through the full parser
+    columns = scan_page(page)
+    if columns is None:
+        columns = parse_page(page)
+    dates, descs, names, amounts, fees, nets, totals = columns
 
-        totals = item.find_all('div', {'class': 'transaction--running-total'})
-        df.loc[i, 'Total'] = totals[0].find('span', {'class': 'SECONDARY'}).text
+    data = {
+        'Date': dates,
+        'Description': descs,
+        'Amount': np.array(amounts, dtype=np.float64),
+        'Fees': np.array(fees, dtype=np.float64),
+        'Net': np.array(nets, dtype=np.float64),
+        'Total': np.array(totals, dtype=np.float64),
+        'Name': names,
+    }
 
-        # details = item.find_all('div', {'class': 'transaction--details'})
-    return df
+    return pd.DataFrame(data, columns=COLUMNS)
 
 
 if __name__ == "__main__":
-    rootdir = os.getcwd()
-    pages = os.listdir(rootdir + '/pages')
+    # Saved pages, with paths straight from the directory scan
+    with os.scandir('pages') as it:
+        pages = [entry.path for entry in it if entry.name.endswith('.html')]
     l = len(pages)
 
     def make_csv(pages):
-        df = pd.DataFrame()
-        for page in pages:
-            page = os.getcwd() + '/pages/' + page
-            df = pd.concat([df, collection(page)], ignore_index=True)
-            print(df)
-        df.to_csv(f'data/eBay_transactions_{time.time()}.csv')
-
-    def make_df(df, l):
-            while l > 0:
-                print(l)
-                html = f'pages/page_{l}.html'
-                new_df = collection(html)
-                print(new_df)
-                l -= 1
-                return pd.concat([new_df, make_df(df, l)], ignore_index=True)
-
-
-    # df = make_df(pd.DataFrame(), l)
-    # df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
+        # Parse pages across processes and append each one, in order, as it
+        # comes back
+        written = 0
+        with ProcessPoolExecutor() as ex:
+            with pa.output_stream(f'data/eBay_transactions_{time.time()}.csv',
+                                  buffer_size=CSV_BUFFER_BYTES) as f:
+                # Arrow's C++ writer emits the header once, then each page
+                with pacsv.CSVWriter(f, CSV_SCHEMA) as writer:
+                    for df in ex.map(collection, pages):
+                        # Keep the row index running across pages
+                        df.index += written
+                        table = pa.Table.from_pandas(df.rename_axis('').reset_index(),
+                                                     schema=CSV_SCHEMA, preserve_index=False)
+                        writer.write_table(table)
+                        written += len(df)
+
+    def make_df(l):
+        # Parse pages 1..l, then concatenate once
+        frames = list()
+        for i in range(1, l + 1):
+            frames.append(collection(f'pages/page_{i}.html'))
+        return pd.concat(frames, ignore_index=True)
+
+
+    # df = make_df(l)
+    # df['Date'] = pd.to_datetime(df['Date'], format=DATE_FORMAT, cache=True).dt.strftime('%Y-%m-%d')
     # df.to_csv(f'data/eBay_transactions_{time.time()}.csv')
 
 
@@ -109,7 +238,6 @@ if __name__ == "__main__":
     # df = make_csv(pages)
 
     for page in pages:
-        page = os.getcwd() + '/pages/' + page
         df = collection(page)
 
         # print(df)
\ No newline at end of file